@@ -1,4 +1,6 @@
 from wacky_envs.env_module import EnvModule, ValueEnvModule
+from wacky_envs.profiler import StepProfiler
+from wacky_envs.normalization import RunningMeanStd, NormReward
 
 from wacky_envs import numbers
 from wacky_envs import dataframes
@@ -10,3 +12,5 @@ from wacky_envs import callables
 from wacky_envs import arrays
 
 from wacky_envs.env import WackyEnv
+from wacky_envs.env_template import EnvTemplate
+from wacky_envs import vector
@@ -1,12 +1,24 @@
 from abc import abstractmethod
 
-from wacky_envs import EnvModule
+import numpy as np
+
+from wacky_envs import EnvModule, ValueEnvModule
+
 
 class BaseAction(EnvModule):
-    """Base module for actions."""
+    """
+    Base module for actions.
+
+    Discrete actions can provide an :attr:`action_mask` of the currently valid actions, after the modules
+    restricting them were found with :func:`BaseAction.bind_mask`. The mask is cached and only computed again,
+    if the :attr:`wacky_envs.ValueEnvModule.version` of one of these modules or of their bounds changed.
+    """
 
     def __init__(self):
         super(BaseAction, self).__init__()
+        self._mask_inputs = None
+        self._mask_key = None
+        self._mask = None
 
     @abstractmethod
     def __call__(self, action):
@@ -16,3 +28,43 @@ class BaseAction(EnvModule):
     @abstractmethod
     def space(self):
         pass
+
+    def bind_mask(self, modules: list) -> None:
+        """
+        Finds the modules, that restrict the valid actions (e.g. the transfers of an atomized value).
+
+        :param modules: All modules of the environment (see :attr:`wacky_envs.WackyEnv.modules`)
+        :type modules: list
+        """
+        inputs = self._find_mask_inputs(modules)
+        if inputs is not None:
+            # The bounds of constrained numbers are modules with own versions:
+            bounds = [getattr(module, name, None) for module in inputs for name in ('upperbound', 'lowerbound')]
+            inputs = {id(module): module for module in inputs + bounds if isinstance(module, ValueEnvModule)}
+            inputs = list(inputs.values())
+        self._mask_inputs = inputs
+        self._mask_key = None
+
+    def _find_mask_inputs(self, modules: list) -> [None, list]:
+        """Modules, whose state the mask depends on. `None`, if the action has no mask."""
+        return None
+
+    def _compute_mask(self) -> np.ndarray:
+        """Computes the mask from the current state of the modules found by :func:`BaseAction.bind_mask`."""
+        raise NotImplementedError
+
+    @property
+    def action_mask(self) -> [None, np.ndarray]:
+        """
+        Boolean mask of the valid actions (read-only), or `None` if the action has no mask
+        or :func:`BaseAction.bind_mask` was not called.
+        """
+        if self._mask_inputs is None:
+            return None
+        key = tuple(module.version for module in self._mask_inputs)
+        if key != self._mask_key:
+            mask = self._compute_mask()
+            mask.setflags(write=False)
+            self._mask = mask
+            self._mask_key = key
+        return self._mask
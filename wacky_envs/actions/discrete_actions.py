@@ -2,20 +2,57 @@ from gym import spaces
 import numpy as np
 from wacky_envs.numbers import FloatConstr
 from wacky_envs.numbers import IntConstr
+from wacky_envs.callables import ValueTransfer
+from wacky_envs.indexer import ByIndex
 from wacky_envs.actions import BaseAction
 
 
+def _check_atoms(actions: np.ndarray, n_atoms) -> None:
+    """Raises an IndexError, if an action is not in `[0, n_atoms)` (the support would accept negative actions)."""
+    if np.any((actions < 0) | (actions >= n_atoms)):
+        raise IndexError(f'Expected atoms in [0, {n_atoms}), got {actions} instead.')
+
+
 class DiscreteAction(BaseAction):
-    """Discrete action that sets a value to :attr:`changeable_decision`."""
+    """
+    Discrete action that sets a value to :attr:`changeable_decision`.
+
+    If the decision is the indexer of a :class:`wacky_envs.indexer.ByIndex` of transfers, the :attr:`action_mask`
+    excludes each transfer, that would currently cause an error signal.
+    """
 
     def __init__(self, changeable_decision):
         """Test"""
         super(DiscreteAction, self).__init__()
         self.changeable_decision = changeable_decision
+        self._mask_choices = []
 
     def __call__(self, action):
         self.changeable_decision.set(action)
 
+    def decode(self, actions) -> np.ndarray:
+        """Values set by many actions at once (the actions themselves), see :func:`AtomizedAction.decode`."""
+        return np.asarray(actions)
+
+    def _find_mask_inputs(self, modules: list) -> list:
+        self._mask_choices = [
+            module for module in modules
+            if isinstance(module, ByIndex) and module.indexer is self.changeable_decision
+        ]
+        return [
+            constr for by_index in self._mask_choices for choice in by_index.choices
+            if isinstance(choice, ValueTransfer)
+            for constr in [choice.delta_x] + choice.mask_inputs
+        ]
+
+    def _compute_mask(self) -> np.ndarray:
+        mask = np.ones(int(self.n), dtype=bool)
+        for by_index in self._mask_choices:
+            for i, choice in enumerate(by_index.choices[:len(mask)]):
+                if isinstance(choice, ValueTransfer):
+                    mask[i] &= bool(choice.valid_transfers(float(choice.delta_x.value)))
+        return mask
+
     @property
     def n(self):
         return self.changeable_decision.n
@@ -26,7 +63,19 @@ class DiscreteAction(BaseAction):
 
 
 class AtomizedAction(BaseAction):
-    """Discrete action for an atomized continuous variable."""
+    """
+    Discrete action for an atomized continuous variable.
+
+    Atom `i` is the value `start + i * step` between the lower and upper bound of :attr:`changeable_value`.
+    By default, all atoms are stored in :attr:`support`. With `lazy`, no support is stored and the values
+    are computed from the atom, which saves memory and construction time for very large numbers of atoms.
+    :func:`AtomizedAction.decode` converts many atoms at once.
+
+    The :attr:`action_mask` excludes each atom, that a :class:`wacky_envs.callables.ValueTransfer` of the variable
+    could currently not transfer (checked for all atoms at once).
+    """
+
+    shared_attrs = ('support',)
 
     def __init__(
             self,
@@ -34,7 +83,25 @@ class AtomizedAction(BaseAction):
             n_atoms: int = None,
             step_size: [int, float] = None,
             suppress_int_exception=False,
+            lazy: bool = False,
     ):
+        """
+        :param changeable_value: Value with lower and upper bound, that is set by the action
+        :type changeable_value: Union[:class:`wacky_envs.numbers.IntConstr`, :class:`wacky_envs.numbers.FloatConstr`]
+
+        :param n_atoms: Number of atoms (either this or `step_size`)
+        :type n_atoms: int
+
+        :param step_size: Distance between two atoms (either this or `n_atoms`)
+        :type step_size: Union[int, float]
+
+        :param suppress_int_exception: Rounds down the number of atoms, instead of raising an exception, if
+            the range of the bounds is not a multiple of `step_size` (optional).
+        :type suppress_int_exception: bool
+
+        :param lazy: Computes the value of each atom when it is needed, instead of storing the support (optional).
+        :type lazy: bool
+        """
         super(AtomizedAction, self).__init__()
 
         if n_atoms is None and step_size is None:
@@ -49,8 +116,8 @@ class AtomizedAction(BaseAction):
         if changeable_value.upperbound is None:
             raise AttributeError('Upper bound not set.')
 
-        start = changeable_value.lowerbound
-        stop = changeable_value.upperbound
+        start = float(changeable_value.lowerbound.value)
+        stop = float(changeable_value.upperbound.value)
 
         if n_atoms is None:
             n_atoms = (stop - start) / step_size
@@ -58,15 +125,60 @@ class AtomizedAction(BaseAction):
             if not n_atoms.is_integer() and not suppress_int_exception:
                 raise Exception('(stop - start) / step_size must be int')
 
-            elif not n_atoms.is_integer():
-                n_atoms = int(n_atoms)
+            # Both bounds are atoms:
+            n_atoms = int(n_atoms) + 1
 
         self.n_atoms = n_atoms
         self.changeable_value = changeable_value
-        self.support = np.linspace(start, stop, num=n_atoms)
+        self.start = start
+        self.stop = stop
+        # Same values as np.linspace, which computes start + i * step and sets the last atom to stop:
+        self.step = (stop - start) / (n_atoms - 1) if n_atoms > 1 else 0.0
+        self._last = stop if n_atoms > 1 else start
+        self.lazy = lazy
+        self.support = None if lazy else np.linspace(start, stop, num=n_atoms)
+        self._mask_transfers = []
 
     def __call__(self, action):
-        self.changeable_value.set(self.support[action])
+        if not 0 <= action < self.n_atoms:
+            raise IndexError(f'Expected an atom in [0, {self.n_atoms}), got {action} instead.')
+        if self.support is not None:
+            self.changeable_value.set(self.support[action])
+        elif action == self.n_atoms - 1:
+            self.changeable_value.set(self._last)
+        else:
+            self.changeable_value.set(self.start + int(action) * self.step)
+
+    def decode(self, actions) -> np.ndarray:
+        """
+        Values of many atoms at once, e.g. of a batch of actions.
+
+        :param actions: Atoms of any shape
+        :type actions: np.ndarray
+
+        :return: Values of the atoms, same shape as `actions`
+        :rtype: np.ndarray
+        """
+        actions = np.asarray(actions)
+        _check_atoms(actions, self.n_atoms)
+        if self.support is not None:
+            return self.support[actions]
+        values = self.start + actions * self.step
+        return np.where(actions == self.n_atoms - 1, self._last, values)
+
+    def _find_mask_inputs(self, modules: list) -> list:
+        self._mask_transfers = [
+            module for module in modules
+            if isinstance(module, ValueTransfer) and module.delta_x is self.changeable_value
+        ]
+        return [module for transfer in self._mask_transfers for module in transfer.mask_inputs]
+
+    def _compute_mask(self) -> np.ndarray:
+        support = self.decode(np.arange(self.n_atoms))
+        mask = np.ones(len(support), dtype=bool)
+        for transfer in self._mask_transfers:
+            mask &= transfer.valid_transfers(support)
+        return mask
 
     @property
     def n(self):
@@ -78,7 +190,11 @@ class AtomizedAction(BaseAction):
 
 
 class DiscreteSinglesToMulti(BaseAction):
-    """Combines discrete actions into a multi-discrete instance."""
+    """
+    Combines discrete actions into a multi-discrete instance.
+
+    The :attr:`action_mask` is the concatenation of the masks of all discrete actions.
+    """
 
     def __init__(self, single_discretes: list):
         super(DiscreteSinglesToMulti, self).__init__()
@@ -88,6 +204,45 @@ class DiscreteSinglesToMulti(BaseAction):
         for act, d_space in zip(action, self.single_discretes):
             d_space(act)
 
+    def decode(self, actions) -> np.ndarray:
+        """
+        Values of a batch of actions in one call.
+
+        If all actions are lazy :class:`AtomizedAction`, all values are computed in one vectorized operation.
+
+        :param actions: Actions of shape `(n_envs, n_dims)` (or `(n_dims,)`)
+        :type actions: np.ndarray
+
+        :return: Value of each action, same shape as `actions`
+        :rtype: np.ndarray
+        """
+        actions = np.asarray(actions)
+        if all(isinstance(d_space, AtomizedAction) and d_space.lazy for d_space in self.single_discretes):
+            start, step, last, n_atoms = (
+                np.array([getattr(d_space, attr) for d_space in self.single_discretes], dtype=float)
+                for attr in ('start', 'step', '_last', 'n_atoms')
+            )
+            _check_atoms(actions, n_atoms.astype(int))
+            return np.where(actions == n_atoms - 1, last, start + actions * step)
+        return np.stack(
+            [d_space.decode(actions[..., i]) for i, d_space in enumerate(self.single_discretes)], axis=-1
+        )
+
+    def bind_mask(self, modules: list) -> None:
+        for d_space in self.single_discretes:
+            d_space.bind_mask(modules)
+        super(DiscreteSinglesToMulti, self).bind_mask(modules)
+
+    def _find_mask_inputs(self, modules: list) -> list:
+        return [module for d_space in self.single_discretes for module in (d_space._mask_inputs or [])]
+
+    def _compute_mask(self) -> np.ndarray:
+        masks = [d_space.action_mask for d_space in self.single_discretes]
+        return np.concatenate([
+            np.ones(int(d_space.n), dtype=bool) if mask is None else mask
+            for mask, d_space in zip(masks, self.single_discretes)
+        ])
+
     @property
     def nvec(self):
         return np.array([d_space.n for d_space in self.single_discretes])
@@ -1,4 +1,5 @@
 from wacky_envs.arrays._base_array import BaseArray
 from wacky_envs.arrays.rand_arr import EpisodeRandIntArray, StepRandIntArray, EpisodeRandFloatArray, StepRandFloatArray
 from wacky_envs.arrays.cdist_arr import CDistArray
-from wacky_envs.arrays.allocations import Allocations
\ No newline at end of file
+from wacky_envs.arrays.allocations import Allocations
+from wacky_envs.arrays.constr_arr import FloatConstrArray, IntConstrArray
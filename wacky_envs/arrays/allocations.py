@@ -12,6 +12,7 @@ class Allocations(BaseArray):
     allow_invalid: bool
     is_occupied: np.ndarray
     places: np.ndarray
+    state_attrs = ('_places', 'error_signal')
 
     def __init__(
             self,
@@ -50,6 +51,7 @@ class Allocations(BaseArray):
     def reset(self) -> None:
         self._places = np.zeros(self.shape, dtype=int).reshape(-1)
         self.error_signal = False
+        self.touch()
 
     def allocate(self, to_allocate: [int, list, np.ndarray]) -> None:
 
@@ -66,6 +68,7 @@ class Allocations(BaseArray):
 
         if not self.error_signal or self.allow_invalid:
             self._places[to_allocate] = 1
+            self.touch()
 
     def __call__(self, *args, **kwargs):
         self.allocate(self.allocator.value)
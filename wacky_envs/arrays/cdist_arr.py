@@ -10,6 +10,8 @@ class CDistArray(BaseArray):
     Calculate distances between two arrays. See the scipy documentation of
     `scipy.spatial.distance.cdist <https://docs.scipy.org/doc/scipy/reference/generated/scipy.spatial.distance.cdist.html#scipy.spatial.distance.cdist>`__
     for more information.
+
+    The distances are cached until the version of `arr1` or `arr2` changes.
     """
 
     def __init__(self, arr1, arr2, metric='euclidean'):
@@ -37,8 +39,15 @@ class CDistArray(BaseArray):
     def metric(self):
         return self._metric
 
+    @property
+    def version(self) -> int:
+        return self._derived_version((self._arr1, self._arr2))
+
     @property
     def value(self):
+        return self._memo(self._cdist)
+
+    def _cdist(self) -> np.ndarray:
         return spatial.distance.cdist(
             self.check_dims(self._arr1.value),
             self.check_dims(self._arr2.value),
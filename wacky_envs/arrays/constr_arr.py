@@ -0,0 +1,315 @@
+import numpy as np
+from gym import spaces
+
+from wacky_envs import ValueEnvModule
+from wacky_envs.arrays import BaseArray
+from wacky_envs.numbers import WackyFloat, WackyMath
+from wacky_envs.dataframes import FixStepperDataframe
+from wacky_envs.indexer import ByIndex
+
+
+class FloatConstrArray(BaseArray):
+    """
+    Array of constrained floats. Applies the constraints of :class:`wacky_envs.numbers.FloatConstr`
+    (bounds, operation times from `rate_add` and `rate_sub`, `action_lock`, `func_time` and error flags)
+    to all elements at once.
+
+    Bounds and rates can be scalars or arrays (broadcast to :attr:`shape`). All state is held in arrays,
+    that are updated in place, so stepping many constraints costs a few NumPy operations instead of
+    one :class:`wacky_envs.numbers.FloatConstr` per element.
+    """
+
+    state_attrs = (
+        '_value', '_prev_value', 'op_x', 'op_time', 'delta_op_x', 'to_accept_op_x', 'to_accept_op_time',
+        'errors', '_prev_step_values',
+    )
+
+    def __init__(
+            self,
+            init_value: [np.ndarray, list],
+            upperbound: [ValueEnvModule, np.ndarray, float] = None,
+            lowerbound: [ValueEnvModule, np.ndarray, float] = None,
+            rate_add: [ValueEnvModule, np.ndarray, float] = None,
+            rate_sub: [ValueEnvModule, np.ndarray, float] = None,
+            func_time: [WackyMath, FixStepperDataframe, ByIndex] = None,
+            action_lock: bool = False,
+            name: str = None,
+    ) -> None:
+        """
+        :param init_value: Initial values. Resets to these values at the start of each episode.
+        :type init_value: np.ndarray
+
+        :param upperbound: Upper bounds (optional)
+        :param lowerbound: Lower bounds (optional)
+        :param rate_add: Operation time per added amount (optional)
+        :param rate_sub: Operation time per subtracted amount (optional)
+
+        :param func_time: Calculates the new values on each step (optional).
+            Called with the current values as array.
+        :type func_time: [:class:`wacky_envs.numbers.WackyMath`, :class:`wacky_envs.dataframes.FixStepperDataframe`]
+
+        :param action_lock: New operations are invalid while an operation is running or waiting (optional).
+        :type action_lock: bool
+
+        :param name: Name of the module (optional)
+        :type name: str
+        """
+        init_value = np.array(init_value, dtype=self.array_dtype)
+        super(FloatConstrArray, self).__init__(init_value)
+        self._name = name
+
+        self.upperbound = self._init_val(upperbound)
+        self.lowerbound = self._init_val(lowerbound)
+        self.rate_add = self._init_val(rate_add)
+        self.rate_sub = self._init_val(rate_sub)
+        self.func_time = self._init_func_time(func_time)
+        self.action_lock = action_lock
+
+    @property
+    def array_dtype(self) -> type:
+        """Datatype of the elements."""
+        return np.float64
+
+    @staticmethod
+    def _init_val(val) -> [None, ValueEnvModule]:
+        '''Checks if parameter values are the right type. Converts floats to WackyFloat and arrays to BaseArray.'''
+        if val is None:
+            return None
+        elif isinstance(val, (int, float)):
+            return WackyFloat(float(val))
+        elif isinstance(val, np.ndarray):
+            return BaseArray(val.astype(np.float64))
+        elif isinstance(val, ValueEnvModule):
+            return val
+        else:
+            raise TypeError(f'Expected type: float, np.ndarray, ValueEnvModule. Got {type(val)} instead.')
+
+    @staticmethod
+    def _init_func_time(val) -> [None, WackyMath, FixStepperDataframe]:
+        '''Checks if parameter func_time is the right type.'''
+        if val is None:
+            return None
+        elif isinstance(val, (WackyMath, FixStepperDataframe, ByIndex)):
+            return val
+        else:
+            raise TypeError(f'Expected type: WackyMath, DataframeFixStepper. Got {type(val)} instead.')
+
+    def _cast(self, value) -> np.ndarray:
+        """Converts new values to the datatype of the elements."""
+        return value
+
+    def set(self, value: [np.ndarray, float], mask: np.ndarray = None) -> None:
+        """
+        Updates `value` and `prev_value` in place, for all elements or only for the elements selected by `mask`.
+
+        :param value: New values, scalar or array broadcastable to :attr:`shape`
+        :param mask: Boolean array of shape :attr:`shape` (optional)
+        """
+        if not self._trusted and not isinstance(value, (np.ndarray, np.number, int, float)):
+            raise TypeError(f"Expected type {self.dtype}, got {type(value)} instead")
+        value = self._cast(value)
+        if mask is None:
+            self._prev_value[...] = self._value
+            self._value[...] = value
+        else:
+            np.copyto(self._prev_value, self._value, where=mask)
+            np.copyto(self._value, np.broadcast_to(value, self.shape), casting='unsafe', where=mask)
+        self._version += 1
+
+    def reset(self) -> None:
+        shape = self.init_value.shape
+        self._value = self.init_value.copy()
+        self._prev_value = self.init_value.copy()
+        self._prev_step_values = np.stack([self.init_value, self.init_value], axis=-1)
+
+        self.errors = np.zeros(shape + (2,))
+        self.op_x = np.zeros(shape, dtype=self.array_dtype)
+        self.op_time = np.zeros(shape)
+        self.delta_op_x = np.zeros(shape, dtype=self.array_dtype)
+        self.to_accept_op_x = np.zeros(shape, dtype=self.array_dtype)
+        self.to_accept_op_time = np.zeros(shape)
+        self._version += 1
+
+    @property
+    def is_operating(self) -> np.ndarray:
+        """Checks for each element if its value will change during the current step."""
+        return self.op_x != 0
+
+    @property
+    def is_waiting(self) -> np.ndarray:
+        """Checks for each element if its value does not change, but the operation timeframe is not zero."""
+        return (self.op_x == 0) & (self.op_time != 0.0)
+
+    @property
+    def error_signal(self) -> np.ndarray:
+        """Checks for each element if anything was invalid when :func:`delta` was called."""
+        return np.any(self.errors, axis=-1)
+
+    @property
+    def op_id(self) -> np.ndarray:
+        """
+        Id of the current operation of each element (see :attr:`wacky_envs.numbers.FloatConstr.op_id`).
+
+        - 0: 'None'
+        - 1: 'add'
+        - 2: 'sub'
+        - 3: 'wait'
+        """
+        running = self.op_time != 0.0
+        return np.select(
+            [~running & (self.op_x == 0), running & (self.op_x > 0), running & (self.op_x < 0), running],
+            [0, 1, 2, 3],
+            default=0,
+        )
+
+    @property
+    def delta_step(self) -> np.ndarray:
+        """
+        Total value differences between current and last step.
+        Usually: delta_step >= delta_op >= delta_value
+        """
+        return self._prev_step_values[..., -1] - self._prev_step_values[..., -2]
+
+    @property
+    def delta_op(self) -> np.ndarray:
+        """
+        Amounts from the last operations.
+        Usually: delta_step >= delta_op >= delta_value
+        """
+        return self.delta_op_x
+
+    def delta(self, x: [np.ndarray, float]) -> None:
+        """Sets up possible value changes based on the restrictions. Must be confirmed in the accept method."""
+        x = np.array(np.broadcast_to(x, self.shape), dtype=np.float64)
+        value = self._value
+
+        if self.upperbound is not None:
+            upper = self.upperbound.value
+            exceeds = (x > 0.0) & ((value + x) > upper)
+            self.errors[exceeds, 0] = 1
+            x = np.where(exceeds, upper - value, x)
+
+        if self.lowerbound is not None:
+            lower = self.lowerbound.value
+            exceeds = (x < 0.0) & ((value - x) < lower)
+            self.errors[exceeds, 0] = 1
+            x = np.where(exceeds, lower - value, x)
+
+        op_time = np.zeros(self.shape)
+        if self.rate_add is not None:
+            op_time = np.where(x > 0, self.rate_add.value * x, op_time)
+        if self.rate_sub is not None:
+            op_time = np.where(x < 0, self.rate_sub.value * np.abs(x), op_time)
+
+        if self.action_lock:
+            locked = (self.op_x != 0) | (self.op_time != 0.0)
+            self.errors[locked, 1] = 1
+            free = ~locked
+            np.copyto(self.to_accept_op_time, op_time, where=free)
+            np.copyto(self.to_accept_op_x, x, casting='unsafe', where=free)
+        else:
+            self.to_accept_op_time[...] = op_time
+            np.copyto(self.to_accept_op_x, x, casting='unsafe')
+
+    def accept(self, x: [np.ndarray, float], delta_t: [np.ndarray, float], mask: np.ndarray = None) -> None:
+        """
+        Accept the value changes with the corresponding timeframes.
+
+        :param x: Value changes
+        :param delta_t: Timeframes of the operations
+        :param mask: Only accepts the changes of the elements selected by this boolean array (optional).
+        """
+        if mask is None:
+            mask = np.ones(self.shape, dtype=bool)
+        x = np.broadcast_to(x, self.shape)
+        instant = mask & (np.asarray(delta_t) == 0.0)
+        pending = mask & ~instant
+
+        np.copyto(self.op_time, delta_t, where=mask)
+        self.set(self._value + x, instant)
+        np.copyto(self.delta_op_x, x, casting='unsafe', where=instant)
+        self.op_x[instant] = 0
+        np.copyto(self.op_x, x, casting='unsafe', where=pending)
+        self.delta_op_x[pending] = 0
+
+    def wait(self, delta_t: [np.ndarray, float]) -> None:
+        """Set up waiting time with delta_t as the timeframe for all elements without an operation."""
+        np.copyto(self.op_time, delta_t, where=(self.op_x == 0) & (self.op_time == 0.0))
+
+    def step(self, t: float, delta_t: float, episode_delta_t: float) -> None:
+        """Complete the accepted operations if the current timeframe delta_t is <= the required operation time."""
+        operating = self.op_x != 0
+        if operating.any():
+            completed = operating & (self.op_time <= delta_t)
+            np.copyto(self.delta_op_x, self.op_x, where=completed)
+            self.set(self.op_x + self._value, completed)
+            self.op_x[completed] = 0
+            self.op_time[completed] = 0.0
+            self.op_time[operating & ~completed] -= delta_t
+
+        if self.func_time is not None:
+            self.set(self._func_time_value(self.func_time.take_step(self._value, t, delta_t, episode_delta_t)))
+
+        x_low = self._value if self.lowerbound is None else np.maximum(self._value, self.lowerbound.value)
+        x_up = self._value if self.upperbound is None else np.minimum(self._value, self.upperbound.value)
+        self.set(np.maximum(x_low, x_up))
+        self.errors[...] = 0.0
+
+        self._prev_step_values[..., 0] = self._prev_step_values[..., 1]
+        self._prev_step_values[..., 1] = self._value
+
+    def _func_time_value(self, value) -> np.ndarray:
+        return np.asarray(value, dtype=np.float64)
+
+    def act(self, input):
+        self.set(input)
+
+    @property
+    def token_dict(self):
+        return {
+            'id': self.id,
+            'module_type': self.__class__.__name__,
+            'dtype': self.dtype,
+            'value': self.value,
+            'init_value': self.init_value,
+            'prev_value': self.prev_value,
+            'delta_value': self.delta_value,
+        }
+
+    @property
+    def space(self):
+        low = np.broadcast_to(self.lowerbound.value, self.shape) if self.lowerbound is not None else -np.inf
+        high = np.broadcast_to(self.upperbound.value, self.shape) if self.upperbound is not None else np.inf
+        return spaces.Box(low=low, high=high, shape=self.shape)
+
+
+class IntConstrArray(FloatConstrArray):
+    """
+    Array of constrained integers. Applies the constraints of :class:`wacky_envs.numbers.IntConstr`
+    to all elements at once. See :class:`wacky_envs.arrays.FloatConstrArray`.
+    """
+
+    @property
+    def array_dtype(self) -> type:
+        """Datatype of the elements."""
+        return np.int64
+
+    def _cast(self, value) -> np.ndarray:
+        return np.trunc(value)
+
+    def _func_time_value(self, value) -> np.ndarray:
+        return np.floor(value)
+
+
+def main():
+    test = FloatConstrArray(np.full(4, 5.0), lowerbound=0.0, upperbound=10.0, rate_add=0.5, rate_sub=0.5)
+    test.delta(np.array([2.0, -7.0, 8.0, 0.0]))
+    print(test.to_accept_op_x, test.to_accept_op_time, test.error_signal)
+    test.accept(test.to_accept_op_x, test.to_accept_op_time)
+    for t in range(1, 5):
+        test.step(t, 1.0, float(t))
+        print(test.value, test.op_id)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,26 @@
 import numpy as np
 from wacky_envs.arrays import BaseArray
 
+_RNG_STATE_SIZE = 10
+
+
+def _pack_rng_state(rng: np.random.Generator) -> np.ndarray:
+    """State of a PCG64 generator as floats (the 128 bit integers are split into 32 bit parts)."""
+    state = rng.bit_generator.state
+    words = [(state['state'][key] >> (32 * i)) & 0xFFFFFFFF for key in ('state', 'inc') for i in range(4)]
+    return np.array(words + [state['has_uint32'], state['uinteger']], dtype=np.float64)
+
+
+def _unpack_rng_state(rng: np.random.Generator, packed: np.ndarray) -> None:
+    """Restores the state of a PCG64 generator packed by :func:`_pack_rng_state`."""
+    words = [int(x) for x in packed]
+    rng.bit_generator.state = {
+        'bit_generator': 'PCG64',
+        'state': {key: sum(words[4 * k + i] << (32 * i) for i in range(4)) for k, key in enumerate(('state', 'inc'))},
+        'has_uint32': words[8],
+        'uinteger': words[9],
+    }
+
 
 class EpisodeRandIntArray(BaseArray):
     """Randomizes value when resetting."""
@@ -12,6 +32,7 @@ class EpisodeRandIntArray(BaseArray):
 
     def reset(self):
         self._value = np.random.randint(self.low, self.high, self.shape)
+        self.touch()
 
 
 class StepRandIntArray(BaseArray):
@@ -24,6 +45,7 @@ class StepRandIntArray(BaseArray):
 
     def reset(self):
         self._value = np.random.randint(self.low, self.high, self.shape)
+        self.touch()
 
     def step(self, _, __, ___) -> None:
         self.reset()
@@ -39,18 +61,103 @@ class EpisodeRandFloatArray(BaseArray):
 
     def reset(self):
         self._value = self.low + np.random.random(self.shape) * (self.high - self.low)
+        self.touch()
 
 
 class StepRandFloatArray(BaseArray):
-    """Randomizes value when resetting and on step() calling."""
+    """
+    Randomizes value when resetting and on step() calling.
 
-    def __init__(self, shape, low=0.0, high=1.0):
+    With a `seed`, the values are drawn from an own random generator. Then the values of a whole episode can be
+    drawn at once on reset (see :func:`wacky_envs.WackyEnv.enable_precompute`).
+    The state of the generator is part of the environment state (see :func:`wacky_envs.WackyEnv.get_state`),
+    the precomputed values are drawn again from it on restore. Clones get their own generator,
+    spawned from the seed of the template.
+    """
+
+    state_attrs = ('_value', '_prev_value', '_table_pos', '_table_source', '_rng_state')
+
+    def __init__(self, shape, low=0.0, high=1.0, seed: int = None):
         super(StepRandFloatArray, self).__init__(low=low, high=high)
         self._shape = shape
+        self._seed = np.random.SeedSequence(seed) if seed is not None else None
+        self._rng = np.random.default_rng(self._seed) if seed is not None else None
+        self._table = None
+        self._table_rng_state = None
+        self._table_pos = 0
         self.reset()
 
+    def _sample(self, shape, rng: np.random.Generator = None) -> np.ndarray:
+        rng = rng if rng is not None else self._rng
+        random = rng.random if rng is not None else np.random.random
+        return self.low + random(shape) * (self.high - self.low)
+
+    @property
+    def _rng_state(self) -> np.ndarray:
+        """Current state of the own generator (zeros without a seed)."""
+        if self._rng is None:
+            return np.zeros(_RNG_STATE_SIZE)
+        return _pack_rng_state(self._rng)
+
+    @_rng_state.setter
+    def _rng_state(self, packed: np.ndarray) -> None:
+        if self._rng is not None:
+            _unpack_rng_state(self._rng, packed)
+
+    @property
+    def _table_source(self) -> np.ndarray:
+        """Length of the precomputed table and the generator state it was drawn from (zeros without a table)."""
+        if self._table is None:
+            return np.zeros(1 + _RNG_STATE_SIZE)
+        return np.concatenate([[len(self._table)], self._table_rng_state])
+
+    @_table_source.setter
+    def _table_source(self, source: np.ndarray) -> None:
+        if source[0] == 0:
+            self._table = None
+        elif not np.array_equal(source, self._table_source):
+            rng = np.random.default_rng()
+            _unpack_rng_state(rng, source[1:])
+            self._draw_table(int(source[0]), rng)
+
     def reset(self):
-        self._value = self.low + np.random.random(self.shape) * (self.high - self.low)
+        if self._table is not None:
+            self._table_pos = 0
+            self._value = self._table[0]
+        else:
+            self._value = self._sample(self.shape)
+        self.touch()
 
     def step(self, _, __, ___) -> None:
-        self.reset()
+        if self._table is not None and self._table_pos + 1 < len(self._table):
+            self._table_pos += 1
+            self._value = self._table[self._table_pos]
+            self.touch()
+        else:
+            self._value = self._sample(self.shape)
+            self.touch()
+
+    @property
+    def time_only(self) -> bool:
+        return self._rng is not None
+
+    def _draw_table(self, length: int, rng: np.random.Generator) -> None:
+        shape = self.shape if isinstance(self.shape, tuple) else (self.shape,)
+        self._table_rng_state = _pack_rng_state(rng)
+        self._table = self._sample((length,) + shape, rng)
+        # Values of steps are views of the table, so it must not change (e.g. by WackyEnv.set_state):
+        self._table.setflags(write=False)
+
+    def precompute(self, t, delta_t, episode_delta_t) -> None:
+        """Draws the values for all steps `t` of an episode at once."""
+        self._draw_table(len(t), self._rng)
+        self._table_pos = 0
+
+    def clear_precomputed(self) -> None:
+        self._table = None
+
+    def _cloned(self) -> None:
+        # Clones get their own generator, spawned from the seed of the template:
+        if self._seed is not None:
+            self._seed = self._seed.spawn(1)[0]
+            self._rng = np.random.default_rng(self._seed)
@@ -1,5 +1,8 @@
 from dataclasses import dataclass
+import numpy as np
+from wacky_envs import ValueEnvModule
 from wacky_envs.numbers import FloatConstr, IntConstr, WackyMath
+from wacky_envs.numbers._equation_compiler import equation_uses_bool_ops
 from wacky_envs.callables import BaseCallable
 
 @dataclass
@@ -53,6 +56,7 @@ class ValueTransfer(BaseCallable):
         self._trans_to = self._init_contr(trans_to)
         self._trans_from_func = self._init_trans_func(trans_from_func)
         self._trans_to_func = self._init_trans_func(trans_to_func)
+        self._trans_to_func_vec = self._vectorize(self._trans_to_func)
 
         # TODO: implement dtype property for everthing
         if not isinstance(self.trans_from, type(self.trans_to)):
@@ -77,6 +81,18 @@ class ValueTransfer(BaseCallable):
         else:
             raise TypeError(f'Expected type: None, WackyMath. Got {type(trans_func)} instead.')
 
+    @staticmethod
+    def _vectorize(trans_func: [None, WackyMath]) -> [None, WackyMath]:
+        """`trans_func` compiled for arrays of `x` (see :func:`ValueTransfer.valid_transfers`), if possible."""
+        if trans_func is None or isinstance(trans_func.dtype, ValueEnvModule):
+            return None
+        try:
+            if equation_uses_bool_ops(trans_func.equation):
+                return None
+            return WackyMath(trans_func.equation, trans_func.var_dict, dtype=trans_func.dtype, vectorized=True)
+        except SyntaxError:
+            return None
+
     @property
     def delta_x(self):
         return self._delta_x
@@ -97,6 +113,34 @@ class ValueTransfer(BaseCallable):
     def trans_to_func(self):
         return self._trans_to_func
 
+    @property
+    def mask_inputs(self) -> list:
+        """Modules, that :func:`ValueTransfer.valid_transfers` depends on (besides :attr:`delta_x`)."""
+        inputs = [self.trans_from, self.trans_to]
+        if self.trans_to_func is not None:
+            # Its version changes with its variables (or on every call, if it can not be cached):
+            inputs.append(self.trans_to_func)
+        return inputs
+
+    def valid_transfers(self, x_from: np.ndarray) -> np.ndarray:
+        """
+        Checks many possible values of :attr:`delta_x` at once, without changing anything.
+
+        :param x_from: Possible values of :attr:`delta_x`
+        :type x_from: np.ndarray
+
+        :return: True for each value, that would be transferred without an error signal
+        :rtype: np.ndarray
+        """
+        x_from = np.asarray(x_from, dtype=float)
+        if self._trans_to_func_vec is not None:
+            x_to = np.abs(np.broadcast_to(self._trans_to_func_vec({'x': x_from}), x_from.shape))
+        elif self.trans_to_func is not None:
+            x_to = np.array([abs(float(self.trans_to_func({'x': x}))) for x in x_from.flat]).reshape(x_from.shape)
+        else:
+            x_to = x_from
+        return self.trans_from.valid_deltas(-x_from) & self.trans_to.valid_deltas(x_to)
+
     def __call__(self) -> None:
 
         x_from = self.delta_x.value
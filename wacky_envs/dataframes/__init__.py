@@ -1,3 +1,6 @@
 from wacky_envs.dataframes._base_dataframe import BaseDataframe, StepperDataframe
-from wacky_envs.dataframes.stepper_dataframe import FixStepperDataframe
-from wacky_envs.dataframes.indexer_dataframe import IndexerDataframe
\ No newline at end of file
+from wacky_envs.dataframes.stepper_dataframe import FixStepperDataframe, TimeStepperDataframe
+from wacky_envs.dataframes.indexer_dataframe import IndexerDataframe
+from wacky_envs.dataframes.memmap_dataframe import MemmapDataframe
+from wacky_envs.dataframes.window_dataframe import WindowDataframe
+from wacky_envs.dataframes.shared_dataset import SharedDataset
\ No newline at end of file
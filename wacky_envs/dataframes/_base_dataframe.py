@@ -1,15 +1,74 @@
 from abc import abstractmethod
 
+import numpy as np
+
 from wacky_envs import ValueEnvModule
+from wacky_envs.dataframes.shared_dataset import SharedDataset
 
 
 class BaseDataframe(ValueEnvModule):
-    """Base module for dataframes."""
+    """
+    Base module for dataframes.
+
+    The dataframe is converted once into a C-contiguous, read-only array of :attr:`dtype` (see :attr:`data`).
+    Rows are read from this array as views, so reading a row does not go through pandas and does not copy.
+    Column names and the original column dtypes are kept in :attr:`columns` and :attr:`dtypes`.
+
+    Instead of a pandas dataframe, a 2D array can be passed. It is used without copying, if it already is
+    C-contiguous and of :attr:`dtype` (e.g. a memory-mapped array, see :class:`MemmapDataframe`).
+    A :class:`SharedDataset` or its name attaches the module to a dataset in shared memory, also without copying.
+    In this case, :attr:`dtype` has to be the datatype of the dataset.
+    """
+
+    shared_attrs = ('_df', '_data')
 
     def __init__(self, df, dtype=float):
         super(ValueEnvModule, self).__init__()
+        if isinstance(df, str):
+            df = SharedDataset.attach(df)
         self._df = df
         self._dtype = dtype
+        self._data = self._to_array(df, dtype)
+        if isinstance(df, SharedDataset):
+            self._columns, self._dtypes = df.columns, df.dtypes
+        elif isinstance(df, np.ndarray):
+            self._columns = tuple(range(df.shape[1]))
+            self._dtypes = {column: df.dtype for column in self._columns}
+        else:
+            self._columns = tuple(df.columns)
+            self._dtypes = dict(df.dtypes)
+
+    @staticmethod
+    def _to_array(df, dtype) -> np.ndarray:
+        if isinstance(df, SharedDataset):
+            if df.data.dtype != np.dtype(dtype):
+                # Converting would copy the dataset into each process:
+                raise TypeError(
+                    f'Expected dtype {df.data.dtype} of the shared dataset {df.name}, got {np.dtype(dtype)} instead.'
+                )
+            df = df.data
+        if isinstance(df, np.ndarray):
+            if df.ndim != 2:
+                raise ValueError(f'Expected an array with 2 dimensions (rows, columns), got {df.ndim} instead.')
+            data = df if df.dtype == np.dtype(dtype) else df.astype(dtype)
+        else:
+            data = df.to_numpy().astype(dtype)
+        # A read-only view, so an array passed by the caller stays writable:
+        data = np.ascontiguousarray(data).view()
+        data.setflags(write=False)
+        return data
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if isinstance(self._df, SharedDataset):
+            # Attached again by name when unpickled:
+            del state['_data']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if '_data' not in state:
+            self._data = self._to_array(self._df, self._dtype)
 
     @property
     def dtype(self) -> type:
@@ -19,6 +78,21 @@ class BaseDataframe(ValueEnvModule):
     def df(self):
         return self._df
 
+    @property
+    def data(self) -> np.ndarray:
+        """Values of the dataframe as read-only array of :attr:`dtype`, shape (rows, columns)."""
+        return self._data
+
+    @property
+    def columns(self) -> tuple:
+        """Column names of the dataframe."""
+        return self._columns
+
+    @property
+    def dtypes(self) -> dict:
+        """Original datatype of each column."""
+        return self._dtypes
+
     @property
     @abstractmethod
     def value(self):
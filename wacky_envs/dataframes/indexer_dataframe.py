@@ -23,7 +23,15 @@ class IndexerDataframe(BaseDataframe):
     def idx(self):
         return self._indexer.value
 
+    @property
+    def version(self) -> int:
+        """Increases, if the version of :attr:`indexer` changed."""
+        return self._derived_version((self._indexer,))
+
     @property
     def value(self):
-        self._value = self.df.iloc[self.idx].to_numpy().astype(self.dtype)
+        self._value = self._memo(self._row)
         return self._value
+
+    def _row(self) -> np.ndarray:
+        return self._data[self.idx]
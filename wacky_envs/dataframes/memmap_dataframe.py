@@ -0,0 +1,137 @@
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from wacky_envs.dataframes import FixStepperDataframe
+
+def _meta_path(path: str) -> str:
+    return f'{path}.json'
+
+
+@dataclass
+class MemmapDataframe(FixStepperDataframe):
+    """
+    Dataframe indexed by step counts (see :class:`wacky_envs.dataframes.FixStepperDataframe`), that is read from
+    a memory-mapped `.npy` file instead of being held in memory. Rows are loaded lazily through the page cache
+    of the operating system, so datasets can be larger than the memory and all processes, that open the same file,
+    share one physical copy.
+
+    Create the file once with :func:`MemmapDataframe.convert`:
+
+    .. code-block:: python
+
+        MemmapDataframe.convert('prices.csv', 'prices.npy')
+        prices = MemmapDataframe('prices.npy')
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens the file read-only. The datatype of the file becomes :attr:`dtype`, so rows are read from the file
+        without converting (e.g. `np.float32` for a file converted with `dtype=np.float32`).
+
+        :param path: Path of a `.npy` file created by :func:`MemmapDataframe.convert`
+        :type path: str
+        """
+        self._path = str(path)
+        data = np.load(self._path, mmap_mode='r')
+        super(MemmapDataframe, self).__init__(data, data.dtype.type)
+        self._read_meta()
+
+    def _read_meta(self) -> None:
+        """Reads the column names and original dtypes, if the metadata file exists."""
+        try:
+            with open(_meta_path(self._path)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        self._columns = tuple(meta['columns'])
+        self._dtypes = {column: np.dtype(dtype) for column, dtype in zip(self._columns, meta['dtypes'])}
+
+    @classmethod
+    def convert(cls, source, path: str, dtype: type = float, chunksize: int = 100000) -> str:
+        """
+        Writes a dataframe or CSV file as `.npy` file of `dtype` and the column names as `<path>.json`.
+        CSV files are read in chunks of `chunksize` rows, so they do not have to fit into memory.
+
+        :param source: A pandas dataframe or the path of a CSV file
+        :type source: [pd.DataFrame, str]
+
+        :param path: Path of the new `.npy` file
+        :type path: str
+
+        :param dtype: Datatype of the values (optional).
+        :type dtype: type
+
+        :param chunksize: Rows per chunk when reading a CSV file (optional).
+        :type chunksize: int
+
+        :return: Path of the `.npy` file
+        :rtype: str
+        """
+        path = str(path)
+        if isinstance(source, pd.DataFrame):
+            chunks = lambda: [source]
+        else:
+            chunks = lambda: pd.read_csv(source, chunksize=chunksize)
+
+        # First pass: Shape and column metadata, second pass: values.
+        n_rows, head = 0, None
+        for chunk in chunks():
+            head = chunk if head is None else head
+            n_rows += len(chunk)
+        if head is None:
+            raise ValueError(f'No rows found in {source}.')
+
+        data = np.lib.format.open_memmap(path, mode='w+', dtype=np.dtype(dtype), shape=(n_rows, head.shape[1]))
+        row = 0
+        for chunk in chunks():
+            data[row:row + len(chunk)] = chunk.to_numpy().astype(dtype)
+            row += len(chunk)
+        data.flush()
+        del data
+
+        with open(_meta_path(path), 'w') as f:
+            json.dump({'columns': [str(c) for c in head.columns], 'dtypes': [str(d) for d in head.dtypes]}, f)
+        return path
+
+    @property
+    def path(self) -> str:
+        """Path of the memory-mapped file."""
+        return self._path
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """Pandas dataframe on top of the memory-mapped values (not copied)."""
+        return pd.DataFrame(self._data, columns=list(self._columns), copy=False)
+
+    def __getstate__(self):
+        # The file is opened again instead of pickling the values:
+        state = self.__dict__.copy()
+        del state['_df'], state['_data']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._df = np.load(self._path, mmap_mode='r')
+        self._data = self._to_array(self._df, self._dtype)
+
+
+def main():
+    import os
+    import tempfile
+    import timeit
+
+    df = pd.DataFrame({'load': np.random.random(100000), 'price': np.random.random(100000)})
+    path = MemmapDataframe.convert(df, os.path.join(tempfile.mkdtemp(), 'series.npy'))
+    test = MemmapDataframe(path)
+    print(test.columns, test.dtypes, test.data.shape, test.init_value)
+
+    n = 10000
+    sec = timeit.timeit(lambda: test.take_step(None, np.random.randint(100000), 1.0, 1.0), number=n)
+    print(f'{sec / n * 1e6:.2f} us per row')
+
+
+if __name__ == '__main__':
+    main()
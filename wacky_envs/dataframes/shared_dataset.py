@@ -0,0 +1,144 @@
+import json
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_PREFIX = 'wacky_'
+_ALIGN = 64
+
+
+class SharedDataset:
+    """
+    Read-only dataset in shared memory, that processes attach to by name.
+
+    The parent process converts a dataset once with :func:`SharedDataset.create`. Dataframe modules
+    (e.g. :class:`wacky_envs.dataframes.FixStepperDataframe`) in the workers attach to it by passing the name
+    instead of a dataframe. All processes read the same physical memory, nothing is copied or unpickled.
+    The shape, dtype and column names are stored in a header of the shared memory block.
+
+    Each process holds one attachment per name (:attr:`SharedDataset.attached`), which is shared by all modules.
+
+    .. code-block:: python
+
+        prices = SharedDataset.create('prices', df)
+        env_fns = [lambda: make_env(FixStepperDataframe('prices')) for _ in range(64)]
+        ...
+        prices.unlink()
+    """
+
+    attached = {}
+    """Datasets attached in this process by name."""
+
+    def __init__(self, name: str, shm: shared_memory.SharedMemory):
+        self._name = name
+        self._shm = shm
+        size = int.from_bytes(shm.buf[:8], 'little')
+        meta = json.loads(bytes(shm.buf[8:8 + size]))
+        self._columns = tuple(meta['columns'])
+        self._dtypes = {column: np.dtype(dtype) for column, dtype in zip(self._columns, meta['dtypes'])}
+        self._data = np.ndarray(
+            tuple(meta['shape']), dtype=np.dtype(meta['dtype']), buffer=shm.buf, offset=meta['offset']
+        )
+        self._data.setflags(write=False)
+
+    @classmethod
+    def create(cls, name: str, source, dtype: type = float) -> 'SharedDataset':
+        """
+        Converts `source` into a shared memory block named `name`.
+
+        :param name: Name of the dataset
+        :type name: str
+
+        :param source: A pandas dataframe, a 2D array or a dataframe module
+            (e.g. :class:`wacky_envs.dataframes.MemmapDataframe`, which is copied without loading it at once).
+
+        :param dtype: Datatype of the values (optional).
+        :type dtype: type
+
+        :return: Dataset, that owns the shared memory
+        :rtype: :class:`SharedDataset`
+        """
+        if name in cls.attached:
+            raise ValueError(f'Dataset {name} already exists in this process.')
+        if hasattr(source, 'data') and hasattr(source, 'columns'):
+            values, columns, dtypes = source.data, source.columns, list(source.dtypes.values())
+        elif isinstance(source, np.ndarray):
+            values, columns, dtypes = source, range(source.shape[1]), [source.dtype] * source.shape[1]
+        else:
+            values, columns, dtypes = source.to_numpy(), source.columns, list(source.dtypes)
+        if values.ndim != 2:
+            raise ValueError(f'Expected a dataset with 2 dimensions (rows, columns), got {values.ndim} instead.')
+
+        dtype = np.dtype(dtype)
+        meta = {
+            'shape': values.shape, 'dtype': dtype.str, 'offset': 0,
+            'columns': [str(c) for c in columns], 'dtypes': [str(d) for d in dtypes],
+        }
+        # The header holds the metadata (with room for the digits of the offset),
+        # the values start at an aligned offset after it:
+        meta['offset'] = -(-(8 + len(json.dumps(meta)) + 20) // _ALIGN) * _ALIGN
+        header = json.dumps(meta).encode()
+
+        shm = shared_memory.SharedMemory(
+            name=_PREFIX + name, create=True, size=meta['offset'] + max(values.size * dtype.itemsize, 1)
+        )
+        shm.buf[:8] = len(header).to_bytes(8, 'little')
+        shm.buf[8:8 + len(header)] = header
+        np.ndarray(values.shape, dtype=dtype, buffer=shm.buf, offset=meta['offset'])[...] = values
+
+        dataset = cls(name, shm)
+        cls.attached[name] = dataset
+        return dataset
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedDataset':
+        """
+        Attaches to the dataset `name` created by another process (or returns the existing attachment).
+
+        :param name: Name of the dataset
+        :type name: str
+
+        :return: Attached dataset
+        :rtype: :class:`SharedDataset`
+        """
+        if name not in cls.attached:
+            cls.attached[name] = cls(name, shared_memory.SharedMemory(name=_PREFIX + name))
+        return cls.attached[name]
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def data(self) -> np.ndarray:
+        """Read-only values, shape (rows, columns)."""
+        return self._data
+
+    @property
+    def columns(self) -> tuple:
+        """Column names of the dataset."""
+        return self._columns
+
+    @property
+    def dtypes(self) -> dict:
+        """Original datatype of each column."""
+        return self._dtypes
+
+    def close(self) -> None:
+        """Detaches this process. Modules using the dataset must be deleted first."""
+        self.attached.pop(self._name, None)
+        self._data = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Closes and frees the shared memory (call once, in the process that created the dataset)."""
+        self.close()
+        self._shm.unlink()
+
+    def __reduce__(self):
+        # Pickled datasets are attached again by name:
+        return SharedDataset.attach, (self._name,)
+
+    def __repr__(self):
+        shape = None if self._data is None else self._data.shape
+        return f"{self.__class__.__name__}(name={self._name}, shape={shape})"
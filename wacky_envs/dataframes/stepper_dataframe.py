@@ -9,6 +9,7 @@ class FixStepperDataframe(StepperDataframe):
 
     value: np.ndarray
     idx: int
+    state_attrs = ('_idx',)
 
     def __init__(self, df, dtype=float):
         super(FixStepperDataframe, self).__init__(df, dtype)
@@ -24,16 +25,139 @@ class FixStepperDataframe(StepperDataframe):
 
     @property
     def init_value(self):
-        return self.df.iloc[0].to_numpy().astype(self.dtype)
+        return self._data[0]
 
     @property
     def value(self):
-        return self.df.iloc[self.idx].to_numpy().astype(self.dtype)
+        return self._data[self._idx]
+
+    def _set_idx(self, idx) -> None:
+        if idx != self._idx:
+            self._idx = idx
+            self._version += 1
 
     def step(self, t, _, ___):
-        self._idx = t
+        self._set_idx(t)
 
     def take_step(self, _, t, __, ___):
-        self._idx = t
+        self._set_idx(t)
         return self.value
 
+
+
+@dataclass
+class TimeStepperDataframe(StepperDataframe):
+    """
+    Dataframe is indexed by the timeframe since episode start (`episode_delta_t`), for steppers with variable
+    step timeframes. Each row has a time (a column or the index of the dataframe), the times must be sorted.
+
+    The row for a time is found with a binary search (`np.searchsorted`) on the times. While time moves forward,
+    a cursor is checked first, so stepping through an episode costs O(1) per step on average.
+    Between two rows the value is either the previous row or linearly interpolated.
+    """
+
+    value: np.ndarray
+    idx: int
+    state_attrs = ('_idx', '_time')
+    INTERPOLATIONS = ('previous', 'linear')
+
+    def __init__(self, df, time_column=None, dtype=float, interpolation: str = 'previous', start: float = None):
+        """
+        :param df: Dataframe with a time for each row
+        :type df: pd.DataFrame
+
+        :param time_column: Column with the times (optional). Uses the index of `df` if not specified.
+            The column is not part of :attr:`value`.
+
+        :param dtype: Datatype of the values (optional). Always float with linear interpolation.
+        :type dtype: type
+
+        :param interpolation: 'previous' (value of the last row at or before the time) or 'linear' (optional).
+        :type interpolation: str
+
+        :param start: Time of the episode start (optional). Defaults to the time of the first row.
+        :type start: float
+        """
+        if interpolation not in self.INTERPOLATIONS:
+            raise ValueError(f'Expected one of {self.INTERPOLATIONS}, got {interpolation} instead.')
+        if time_column is None:
+            times = df.index.to_numpy()
+        else:
+            times = df[time_column].to_numpy()
+            df = df.drop(columns=time_column)
+        super(TimeStepperDataframe, self).__init__(df, float if interpolation == 'linear' else dtype)
+
+        self._times = np.ascontiguousarray(times, dtype=np.float64)
+        if len(self._times) == 0 or np.any(np.diff(self._times) < 0):
+            raise ValueError('Expected sorted times with at least one row.')
+        self._times.setflags(write=False)
+        self._interpolation = interpolation
+        self._start = float(self._times[0]) if start is None else float(start)
+        self._idx = 0
+        self._time = self._start
+        self._set_time(self._start)
+
+    @property
+    def times(self) -> np.ndarray:
+        """Time of each row."""
+        return self._times
+
+    @property
+    def interpolation(self) -> str:
+        return self._interpolation
+
+    @property
+    def idx(self):
+        """Last row at or before the current time."""
+        return self._idx
+
+    @property
+    def time(self) -> float:
+        """Current time (episode start + `episode_delta_t`)."""
+        return self._time
+
+    def _find(self, time: float) -> int:
+        """Index of the last row at or before `time` (0 if `time` is before the first row)."""
+        times, idx, n = self._times, self._idx, len(self._times)
+        if times[idx] <= time:
+            # Cursor: Time usually moves forward by less than two rows per step.
+            if idx + 1 == n or time < times[idx + 1]:
+                return idx
+            if idx + 2 == n or time < times[idx + 2]:
+                return idx + 1
+        return max(int(np.searchsorted(times, time, side='right')) - 1, 0)
+
+    def _set_time(self, time: float) -> None:
+        idx = self._find(time)
+        if idx != self._idx or (self._interpolation == 'linear' and time != self._time):
+            self._version += 1
+        self._idx = idx
+        self._time = time
+
+    def _row_at(self, idx: int, time: float) -> np.ndarray:
+        if self._interpolation == 'previous' or idx + 1 == len(self._times) or time <= self._times[idx]:
+            return self._data[idx]
+        weight = (time - self._times[idx]) / (self._times[idx + 1] - self._times[idx])
+        return self._data[idx] + weight * (self._data[idx + 1] - self._data[idx])
+
+    def reset(self) -> None:
+        self._set_time(self._start)
+        super(TimeStepperDataframe, self).reset()
+
+    @property
+    def init_value(self):
+        return self._row_at(max(int(np.searchsorted(self._times, self._start, side='right')) - 1, 0), self._start)
+
+    @property
+    def value(self):
+        return self._memo(self._row)
+
+    def _row(self) -> np.ndarray:
+        return self._row_at(self._idx, self._time)
+
+    def step(self, _, __, episode_delta_t):
+        self._set_time(self._start + episode_delta_t)
+
+    def take_step(self, _, __, ___, episode_delta_t):
+        self._set_time(self._start + episode_delta_t)
+        return self.value
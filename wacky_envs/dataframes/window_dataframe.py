@@ -0,0 +1,190 @@
+import copy
+import queue
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from wacky_envs.dataframes import BaseDataframe, FixStepperDataframe
+
+
+def _prefetch(data: np.ndarray, window: int, rng: np.random.Generator, windows: queue.Queue, stop: threading.Event):
+    """
+    Reads random windows of `data` into `windows`, until `stop` is set. `rng` is a copy of the generator of the
+    module, so the same offsets are drawn ahead of the module.
+    """
+    while not stop.is_set():
+        offset = int(rng.integers(0, len(data) - window + 1))
+        item = (offset, np.array(data[offset:offset + window]))
+        while not stop.is_set():
+            try:
+                windows.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+
+@dataclass
+class WindowDataframe(FixStepperDataframe):
+    """
+    Dataframe indexed by step counts (see :class:`wacky_envs.dataframes.FixStepperDataframe`), where each episode
+    starts at a random offset into a long series and reads the next :attr:`window` rows.
+
+    A background thread reads the windows for the next episodes while the current episode runs, so
+    :func:`reset` does not wait for I/O (e.g. of a :class:`wacky_envs.dataframes.MemmapDataframe`) if the
+    prefetched window is ready. The offsets are drawn from an own random generator in the same order,
+    with or without prefetching. The thread draws from a copy of this generator, so the generator of the module
+    is only advanced by :func:`reset` and pickled modules resume after the last window that was used.
+    """
+
+    state_attrs = ('_idx', '_offset')
+
+    def __init__(self, df, window: int, dtype=float, seed: int = None, prefetch: int = 2):
+        """
+        :param df: A pandas dataframe, a 2D array or another dataframe module
+            (e.g. :class:`wacky_envs.dataframes.MemmapDataframe`), whose values are used without copying.
+
+        :param window: Rows per episode, at least `max_t + 1` of the stepper.
+        :type window: int
+
+        :param dtype: Datatype of the values (optional).
+        :type dtype: type
+
+        :param seed: Seed of the random offsets (optional).
+        :type seed: int
+
+        :param prefetch: Number of windows read ahead by the background thread (optional).
+            With 0, windows are read on :func:`reset`.
+        :type prefetch: int
+        """
+        if isinstance(df, BaseDataframe):
+            df, dtype = df.data, df.dtype
+        super(WindowDataframe, self).__init__(df, dtype)
+        if not 0 < window <= len(self._data):
+            raise ValueError(f'Expected a window between 1 and {len(self._data)} rows, got {window} instead.')
+        self._window_size = window
+        self._seed = np.random.SeedSequence(seed)
+        self._rng = np.random.default_rng(self._seed)
+        self._prefetch = prefetch
+        self._offset = None
+        self._window = None
+        self._window_offset = None
+        self._hits = 0
+        self._misses = 0
+        self._start()
+
+    def _start(self) -> None:
+        self._windows = queue.Queue(maxsize=self._prefetch) if self._prefetch > 0 else None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def window(self) -> int:
+        """Rows per episode."""
+        return self._window_size
+
+    @property
+    def offset(self):
+        """Row of the series, where the current episode started (`None` before the first window)."""
+        return self._offset
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of prefetched windows, that are ready."""
+        return self._windows.qsize() if self._windows is not None else 0
+
+    @property
+    def stats(self) -> dict:
+        """Prefetch statistics: Windows that were ready on reset (hits), windows that were waited for (misses)."""
+        return {'hits': self._hits, 'misses': self._misses, 'queue_depth': self.queue_depth}
+
+    def _next_window(self) -> None:
+        if self._windows is not None and self._thread is None:
+            self._thread = threading.Thread(
+                target=_prefetch,
+                args=(self._data, self._window_size, copy.deepcopy(self._rng), self._windows, self._stop),
+                daemon=True,
+            )
+            self._thread.start()
+
+        offset = int(self._rng.integers(0, len(self._data) - self._window_size + 1))
+        if self._windows is None:
+            window = np.array(self._data[offset:offset + self._window_size])
+            self._misses += 1
+        else:
+            try:
+                queued_offset, window = self._windows.get_nowait()
+                self._hits += 1
+            except queue.Empty:
+                queued_offset, window = self._windows.get()
+                self._misses += 1
+            if queued_offset != offset:
+                raise RuntimeError(
+                    f'Prefetched window starts at offset {queued_offset}, expected offset {offset}. '
+                    f'The random generator was changed after prefetching started.'
+                )
+        window.setflags(write=False)
+        self._offset = self._window_offset = offset
+        self._window = window
+
+    def _rows(self) -> np.ndarray:
+        if self._offset is None:
+            self._next_window()
+        elif self._offset != self._window_offset:
+            # Offset was restored (e.g. by WackyEnv.set_state), read the window again:
+            self._window = self._data[self._offset:self._offset + self._window_size]
+            self._window_offset = self._offset
+        return self._window
+
+    def reset(self) -> None:
+        self._next_window()
+        super(WindowDataframe, self).reset()
+
+    @property
+    def init_value(self):
+        return self._rows()[0]
+
+    @property
+    def value(self):
+        return self._rows()[self._idx]
+
+    def close(self) -> None:
+        """Stops the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._start()
+
+    def _cloned(self) -> None:
+        # Clones get their own generator (spawned from the seed of the template) and thread:
+        self._seed = self._seed.spawn(1)[0]
+        self._rng = np.random.default_rng(self._seed)
+        self._start()
+
+    def __getstate__(self):
+        state = super(WindowDataframe, self).__getstate__()
+        del state['_windows'], state['_stop'], state['_thread']
+        return state
+
+    def __setstate__(self, state):
+        super(WindowDataframe, self).__setstate__(state)
+        self._start()
+
+
+def main():
+    import timeit
+
+    series = np.random.random((1000000, 2))
+    test = WindowDataframe(series, window=1000, seed=0)
+    for t in range(3):
+        test.take_step(None, t, 1.0, 1.0)
+    print(test.offset, test.value)
+
+    n = 100
+    sec = timeit.timeit(test.reset, number=n)
+    print(f'{sec / n * 1e6:.2f} us per reset', test.stats)
+    test.close()
+
+
+if __name__ == '__main__':
+    main()
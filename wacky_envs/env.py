@@ -1,14 +1,18 @@
+import time
+
 import gym
 import numpy as np
 from gym import spaces
 from typing import Any
 
 from wacky_envs.actions import BaseAction
-from wacky_envs.observations import BaseObs
+from wacky_envs.observations import BaseObs, BoxObs
 from wacky_envs.steppers import BaseStepper
-from wacky_envs.numbers import WackyNumber
+from wacky_envs.numbers import WackyNumber, NumberArena
 from wacky_envs.callables import BaseCallable
-from wacky_envs import EnvModule, ValueEnvModule
+from wacky_envs import EnvModule, ValueEnvModule, NormReward
+from wacky_envs.profiler import StepProfiler
+from wacky_envs.env_state import StateLayout, collect_modules
 
 
 class WackyEnv(gym.Env):
@@ -39,15 +43,17 @@ class WackyEnv(gym.Env):
     This is also the case, if the action is an index for something else (e.g., for a callable :class:`BaseCallable`).
     Next, all :func:`EnvModule.step` methods are called according to the order of the list :attr:`self.step_modules`.
     Then the stepper counts the next step and adds the step timeframe to the total episode timeframe by calling
-    :func:`_stepper.next`. Finally, the returns :attr:`observation`, :attr:`reward`, :attr:`done` and :attr:`info`
-    are called. Keep in mind that these attributes are properties. The whole call order is:
+    :func:`_stepper.next`. The observation module (and a :class:`wacky_envs.NormReward`) steps once with the new
+    step count, e.g. to update its statistics. Finally, the returns :attr:`observation`, :attr:`reward`, :attr:`done`
+    and :attr:`info` are called. Keep in mind that these attributes are properties. The whole call order is:
 
     - :func:`BaseAction.__call__`
     - List[:func:`EnvModule.step`]
+    - :func:`BaseObs.step` (and :func:`wacky_envs.NormReward.step`)
     - :attr:`observation` -> :func:`BaseObs.__call__`
     - :attr:`rewards` -> :func:`WackyNumber.__call__` or :func:`WackyMath.__call__`
     - :attr:`done` -> :func:`WackyNumber.__call__` or :func:`WackyMath.__call__`
-    - :attr:`info` -> None
+    - :attr:`info` -> dict (see :func:`WackyEnv.enable_action_mask`)
 
     .. code-block:: python
 
@@ -66,11 +72,15 @@ class WackyEnv(gym.Env):
 
             self._stepper.next()
             self._terminator.step(self.t, self.delta_t, self.episode_delta_t)
+            self._obs.step(self.t, self.delta_t, self.episode_delta_t)
             done = self.done
             return self.observation, self.reward, done, self.info
 
     """
 
+    VALIDATION_LEVELS = ('full', 'auto', 'trusted')
+    """Validation levels, see :func:`WackyEnv.set_validation`."""
+
     def __init__(
             self,
             stepper: BaseStepper,
@@ -82,6 +92,7 @@ class WackyEnv(gym.Env):
             call_modules: list = None,
             step_modules: list = None,
             watch_modules: list = None,
+            validation: str = 'auto',
     ):
         """
         Assigns all environment modules to their attributes.
@@ -121,6 +132,10 @@ class WackyEnv(gym.Env):
         :param watch_modules:
             List of modules flagged for debugging.
         :type watch_modules: List[:class:`wacky_envs.EnvModule`]
+
+        :param validation:
+            Validation level for the datatype checks of the modules, see :func:`WackyEnv.set_validation` (optional).
+        :type validation: str
         """
         self._stepper = stepper
         self._obs = observation
@@ -131,6 +146,247 @@ class WackyEnv(gym.Env):
         self.call_modules = call_modules
         self.step_modules = step_modules
         self.watch_modules = watch_modules
+        self._frozen = False
+        self._profiler = None
+        self._state_layout = None
+        self._n_resets = 0
+        self._time_modules = ()
+        self._action_mask = False
+        self.set_validation(validation)
+
+    def set_validation(self, level: str) -> None:
+        """
+        Sets the validation level for the datatype checks in :func:`ValueEnvModule.set` and
+        :func:`ValueEnvModule.set_init` of all modules (numbers, arrays, steppers, ect.):
+
+        - 'full': Always checks.
+        - 'auto': Checks during construction and the first episode, skips the checks from the second episode on.
+        - 'trusted': Skips the checks from now on.
+
+        :param level: One of :attr:`WackyEnv.VALIDATION_LEVELS`
+        :type level: str
+        """
+        if level not in self.VALIDATION_LEVELS:
+            raise ValueError(f"Expected validation level in {self.VALIDATION_LEVELS}, got {level} instead.")
+        self._validation = level
+        self._trust_modules(level == 'trusted' or (level == 'auto' and self._n_resets > 1))
+
+    @property
+    def validation(self) -> str:
+        """Validation level, see :func:`WackyEnv.set_validation`."""
+        return self._validation
+
+    def _trust_modules(self, trusted: bool) -> None:
+        for module in self.modules:
+            if isinstance(module, ValueEnvModule):
+                module.trust(trusted)
+
+    def freeze(self) -> 'WackyEnv':
+        """
+        Compiles :func:`WackyEnv.step` into a step plan: The lists :attr:`call_modules` and :attr:`step_modules`
+        are resolved into flat tuples of bound methods, the stepper values `t`, `delta_t` and `episode_delta_t`
+        are read once per step and the loops run without exception handling for each module.
+        If a module raises an error, the same diagnostics as in the unfrozen step are printed.
+
+        Note:
+            Changes to the module lists after freezing are ignored until :func:`WackyEnv.freeze` is called again.
+
+        :return: The frozen environment
+        :rtype: :class:`WackyEnv`
+        """
+        self._frozen_calls = tuple(module.__call__ for module in self.call_modules or ())
+        self._frozen_steps = tuple(module.step for module in self.step_modules or ())
+        self._frozen = True
+        return self
+
+    def unfreeze(self) -> 'WackyEnv':
+        """
+        Switches back to the unfrozen :func:`WackyEnv.step`.
+
+        :return: The unfrozen environment
+        :rtype: :class:`WackyEnv`
+        """
+        self._frozen = False
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        """True, if :func:`WackyEnv.step` runs the step plan compiled by :func:`WackyEnv.freeze`."""
+        return self._frozen
+
+    def enable_profiling(self, profiler: StepProfiler = None) -> StepProfiler:
+        """
+        Records wall time and call counts of each module per phase in :func:`WackyEnv.step` and
+        :func:`WackyEnv.reset`. While profiling is enabled, the unfrozen call order is used.
+        Profiling is disabled by default and costs nothing then.
+
+        :param profiler: Profiler to record to (optional). A new one is created if `None`.
+        :type profiler: :class:`wacky_envs.StepProfiler`
+
+        :return: The profiler, which can be exported with :func:`StepProfiler.table` or :func:`StepProfiler.to_json`
+        :rtype: :class:`wacky_envs.StepProfiler`
+        """
+        self._profiler = profiler if profiler is not None else StepProfiler()
+        return self._profiler
+
+    def disable_profiling(self) -> StepProfiler:
+        """
+        Stops profiling.
+
+        :return: The profiler that was used (or `None`)
+        :rtype: :class:`wacky_envs.StepProfiler`
+        """
+        profiler, self._profiler = self._profiler, None
+        return profiler
+
+    @property
+    def profiler(self) -> StepProfiler:
+        """Profiler, if profiling is enabled. Otherwise `None`."""
+        return self._profiler
+
+    def enable_precompute(self) -> list:
+        """
+        Finds all modules that only depend on `t`, `delta_t` and `episode_delta_t` (see :attr:`EnvModule.time_only`),
+        e.g. a :class:`wacky_envs.numbers.WackyMath` without module variables used as `func_time`
+        or a seeded :class:`wacky_envs.arrays.StepRandFloatArray`.
+        From now on, these modules are evaluated for all steps of an episode in one vectorized pass on
+        each :func:`WackyEnv.reset`, so each step becomes a lookup.
+
+        Note:
+            Requires a stepper with a fixed `delta_t` (or none) and `max_t`.
+
+        :return: Precomputed modules
+        :rtype: list
+        """
+        if self._stepper.max_t is None:
+            raise ValueError('Precomputing episodes requires a stepper with max_t.')
+        self._time_modules = tuple(module for module in self.modules if module.time_only)
+        return list(self._time_modules)
+
+    def disable_precompute(self) -> None:
+        """Stops precomputing modules on :func:`WackyEnv.reset` and removes the precomputed results."""
+        for module in self._time_modules:
+            module.clear_precomputed()
+        self._time_modules = ()
+
+    def _precompute(self) -> None:
+        """Evaluates the modules found by :func:`WackyEnv.enable_precompute` for all steps of the episode."""
+        t = np.arange(self._stepper.max_t + 1)
+        delta_t = self._stepper.delta_t
+        episode_delta_t = None if delta_t is None else self._stepper.value + t * delta_t
+        for module in self._time_modules:
+            module.precompute(t, delta_t, episode_delta_t)
+
+    def enable_action_mask(self) -> np.ndarray:
+        """
+        Adds the mask of the currently valid actions to :attr:`info` (as `info['action_mask']`),
+        e.g. for masked policies. Finds the modules restricting the actions (see :func:`BaseAction.bind_mask`),
+        so call it again after adding modules.
+
+        Note:
+            Only discrete actions (e.g. :class:`wacky_envs.actions.AtomizedAction`) provide a mask.
+
+        :return: The current mask
+        :rtype: np.ndarray
+        """
+        self._action.bind_mask(self.modules)
+        if self._action.action_mask is None:
+            raise ValueError(f'{type(self._action).__name__} provides no action mask.')
+        self._action_mask = True
+        return self._action.action_mask
+
+    def disable_action_mask(self) -> None:
+        """Stops adding the action mask to :attr:`info`."""
+        self._action_mask = False
+
+    def use_arena(self, arena: NumberArena = None) -> NumberArena:
+        """
+        Attaches all numbers (:class:`wacky_envs.numbers.WackyNumber`) of the environment to a
+        :class:`wacky_envs.numbers.NumberArena`. The observed numbers are attached first, so a
+        :class:`wacky_envs.observations.BoxObs` of numbers reads its observation as one slice of the arena.
+
+        :param arena: Arena to attach to (optional). A new one is created if `None`.
+        :type arena: :class:`wacky_envs.numbers.NumberArena`
+
+        :return: The arena
+        :rtype: :class:`wacky_envs.numbers.NumberArena`
+        """
+        arena = arena if arena is not None else NumberArena()
+        numbers = [module for module in self.modules if isinstance(module, WackyNumber)]
+
+        if isinstance(self._obs, BoxObs) and all(isinstance(m, WackyNumber) for m in self._obs.value_list):
+            arena.attach(self._obs.value_list)
+            arena.attach(numbers)
+            self._obs.bind_arena(arena)
+        else:
+            arena.attach(numbers)
+
+        self._state_layout = None
+        return arena
+
+    @property
+    def modules(self) -> list:
+        """All modules of the environment, including modules that are only referenced by other modules."""
+        return collect_modules([
+            self._stepper, self._obs, self._action, self._reward, self._terminator,
+            self.reset_modules, self.call_modules, self.step_modules,
+        ])
+
+    def build_state_layout(self, rng: bool = True) -> StateLayout:
+        """
+        (Re)builds the layout of the flat state buffer from the current state of all modules.
+
+        :param rng: Also stores the state of the global `numpy` and `random` generators (optional).
+            Skipping them makes :func:`WackyEnv.get_state` and :func:`WackyEnv.set_state` considerably faster.
+        :type rng: bool
+
+        :return: Layout used by :func:`WackyEnv.get_state` and :func:`WackyEnv.set_state`
+        :rtype: :class:`wacky_envs.env_state.StateLayout`
+        """
+        self._state_layout = StateLayout(self.modules, rng=rng)
+        return self._state_layout
+
+    @property
+    def state_layout(self) -> StateLayout:
+        """Layout of the flat state buffer. Built from the current state on first access."""
+        if self._state_layout is None:
+            self.build_state_layout()
+        return self._state_layout
+
+    def get_state(self, out: np.ndarray = None) -> np.ndarray:
+        """
+        Gathers the mutable state of all modules (values, operations, errors, step counters, allocations, ect.) and
+        of the global random generators into one flat float64 buffer. Useful for branching in planning or tree search
+        without copying the whole environment.
+
+        Note:
+            The layout is built on the first call. Call :func:`WackyEnv.reset` first, so all values are set.
+
+        :param out: Buffer to write to (optional). A new buffer is allocated if `None`.
+        :type out: np.ndarray
+
+        :return: Flat state buffer
+        :rtype: np.ndarray
+        """
+        return self.state_layout.gather(out)
+
+    def set_state(self, state: np.ndarray) -> None:
+        """
+        Restores a state gathered by :func:`WackyEnv.get_state`.
+
+        :param state: Flat state buffer
+        :type state: np.ndarray
+        """
+        self.state_layout.scatter(state)
+
+    def _timed(self, phase: str, module: EnvModule, func, *args):
+        """Calls `func` and adds the wall time to the counter of `module` in `phase`."""
+        counter = self._profiler.counter(phase, module)
+        start = time.perf_counter()
+        output = func(*args)
+        counter[1] += time.perf_counter() - start
+        counter[0] += 1
+        return output
 
     @property
     def observation_space(self) -> spaces.Space:
@@ -180,11 +436,13 @@ class WackyEnv(gym.Env):
     @property
     def info(self) -> dict:
         """
-        Nothing implemented yet (Important later, e.g., useful for action masking).
+        Holds the mask of the valid actions as `'action_mask'`, if :func:`WackyEnv.enable_action_mask` was called.
 
-        :return: Empty dict
+        :return: Info dict (empty by default)
         :rtype: dict
         """
+        if self._action_mask:
+            return {'action_mask': self._action.action_mask}
         return {}
 
     @property
@@ -222,6 +480,10 @@ class WackyEnv(gym.Env):
         :return: Tuple of observation, reward, done and info
         :rtype: tuple
         """
+        if self._profiler is not None:
+            return self._profiled_step(action)
+        if self._frozen:
+            return self._frozen_step(action)
 
         self._action(action)
 
@@ -249,9 +511,74 @@ class WackyEnv(gym.Env):
 
         self._stepper.next()
         self._terminator.step(self.t, self.delta_t, self.episode_delta_t)
-        #self._reward.step(self.t, self.delta_t, self.episode_delta_t)
+        self._obs.step(self.t, self.delta_t, self.episode_delta_t)
+        if isinstance(self._reward, NormReward):
+            self._reward.step(self.t, self.delta_t, self.episode_delta_t)
         return self.observation, self.reward, self.done, self.info
 
+    def _frozen_step(self, action) -> tuple:
+        """Runs the step plan compiled by :func:`WackyEnv.freeze`. Same call order as :func:`WackyEnv.step`."""
+        stepper = self._stepper
+        self._action(action)
+
+        try:
+            for call in self._frozen_calls:
+                call()
+        except Exception as e:
+            # Calls of non-module callables (e.g. SubSteps or functions) have no __self__:
+            print(e)
+            print(getattr(call, '__self__', call))
+            raise
+
+        t, delta_t, episode_delta_t = stepper.t, stepper.delta_t, stepper.episode_delta_t
+        try:
+            for step in self._frozen_steps:
+                step(t, delta_t, episode_delta_t)
+        except Exception as e:
+            module = getattr(step, '__self__', step)
+            print(e)
+            print(getattr(module, 'watch_dict', repr(module)))
+            raise
+
+        if self.watch_modules is not None:
+            for module in self.watch_modules:
+                print(module.watch_dict)
+
+        stepper.next()
+        t, delta_t, episode_delta_t = stepper.t, stepper.delta_t, stepper.episode_delta_t
+        self._terminator.step(t, delta_t, episode_delta_t)
+        self._obs.step(t, delta_t, episode_delta_t)
+        if isinstance(self._reward, NormReward):
+            self._reward.step(t, delta_t, episode_delta_t)
+        return self._obs(), self._reward(), self._terminator() or stepper.done, self.info
+
+    def _profiled_step(self, action) -> tuple:
+        """Same call order as :func:`WackyEnv.step`, but each module call is timed by :attr:`profiler`."""
+        timed = self._timed
+        timed('action', self._action, self._action, action)
+
+        if self.call_modules is not None:
+            for module in self.call_modules:
+                timed('call_modules', module, module)
+
+        if self.step_modules is not None:
+            for module in self.step_modules:
+                timed('step_modules', module, module.step, self.t, self.delta_t, self.episode_delta_t)
+
+        if self.watch_modules is not None:
+            for module in self.watch_modules:
+                print(module.watch_dict)
+
+        timed('stepper', self._stepper, self._stepper.next)
+        timed('terminator_step', self._terminator, self._terminator.step, self.t, self.delta_t, self.episode_delta_t)
+        timed('observation_step', self._obs, self._obs.step, self.t, self.delta_t, self.episode_delta_t)
+        if isinstance(self._reward, NormReward):
+            timed('reward_step', self._reward, self._reward.step, self.t, self.delta_t, self.episode_delta_t)
+        observation = timed('observation', self._obs, self._obs)
+        reward = timed('reward', self._reward, self._reward)
+        done = timed('terminator', self._terminator, self._terminator) or self._stepper.done
+        return observation, reward, done, self.info
+
     def reset(self) -> np.ndarray:
         """
         The environment resets if a new episode starts. See class description above for more details.
@@ -259,10 +586,27 @@ class WackyEnv(gym.Env):
         :return: Current Observations
         :rtype: np.ndarray
         """
+        self._n_resets += 1
+        if self._n_resets == 2 and self._validation == 'auto':
+            self._trust_modules(True)
+
+        if self._profiler is not None:
+            self._timed('stepper', self._stepper, self._stepper.reset)
+            if self._time_modules:
+                self._precompute()
+            if self.reset_modules is not None:
+                for module in self.reset_modules:
+                    self._timed('reset_modules', module, module.reset)
+            self._obs.reset()
+            return self._timed('observation', self._obs, self._obs)
+
         self._stepper.reset()
+        if self._time_modules:
+            self._precompute()
         if self.reset_modules is not None:
             for module in self.reset_modules:
                 module.reset()
+        self._obs.reset()
         return self.observation
 
     def render(self, mode='human'):
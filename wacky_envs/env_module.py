@@ -13,6 +13,10 @@ class EnvModule(ABC):
     classname: str
     newid = itertools.count()
     """Counting the number of environment moduls for assigning unique ids."""
+    state_attrs = ()
+    """Names of attributes that hold the mutable state (see :class:`wacky_envs.env_state.StateLayout`)."""
+    shared_attrs = ()
+    """Names of attributes that are never changed and shared between clones (see :class:`wacky_envs.EnvTemplate`)."""
 
     def __init__(self, name: str = None):
         """Assigns name and unique id"""
@@ -26,6 +30,38 @@ class EnvModule(ABC):
         """Classname of instance"""
         return self.__class__.__name__
 
+    def _cloned(self) -> None:
+        """Called on the clone after :class:`wacky_envs.EnvTemplate` cloned the module and remapped its references."""
+        pass
+
+    @property
+    def time_only(self) -> bool:
+        """
+        True, if the module only depends on `t`, `delta_t` and `episode_delta_t` and can be precomputed
+        for a whole episode (see :func:`wacky_envs.WackyEnv.enable_precompute`).
+        """
+        return False
+
+    def precompute(self, t, delta_t, episode_delta_t) -> None:
+        """
+        Precomputes the module for all steps of an episode, so each step becomes a lookup.
+        Only called if :attr:`time_only` is True.
+
+        :param t: Step counts of the episode, `np.arange(max_t + 1)`
+        :type t: np.ndarray
+
+        :param delta_t: Step timeframe
+        :type delta_t: float
+
+        :param episode_delta_t: Episode timeframe for each step count (or `None`)
+        :type episode_delta_t: np.ndarray
+        """
+        pass
+
+    def clear_precomputed(self) -> None:
+        """Removes the results of :func:`precompute`."""
+        pass
+
     @property
     def name(self):
         """Either user assigned name or None"""
@@ -72,6 +108,12 @@ class ValueEnvModule(EnvModule):
     prev_value: Any
     delta_value: Any
     dtype: type
+    state_attrs = ('_value', '_prev_value')
+    _trusted = False
+    _version = 0
+    _inputs_key = None
+    _memo_version = None
+    _memo_value = None
 
     @property
     def dtype(self) -> type:
@@ -100,6 +142,21 @@ class ValueEnvModule(EnvModule):
         :class:`wacky_envs.EnvModule`. (Example: See rewards for the peak-shaver)"""
         return self.value
 
+    @property
+    def trusted(self) -> bool:
+        """True, if :func:`set` and :func:`set_init` skip the datatype check (see :func:`ValueEnvModule.trust`)."""
+        return self._trusted
+
+    def trust(self, trusted: bool = True) -> None:
+        """
+        Switches the datatype check of :func:`set` and :func:`set_init` off (or on again).
+        Usually called for all modules by :class:`wacky_envs.WackyEnv` (see :func:`WackyEnv.set_validation`).
+
+        :param trusted: Skip the datatype check, if True.
+        :type trusted: bool
+        """
+        self._trusted = trusted
+
     def set_init(self, init_value: Any) -> None:
         """
         Updates `init_value` after checking if the value is the right datatype.
@@ -107,9 +164,10 @@ class ValueEnvModule(EnvModule):
         :param init_value: Set new `init_value`
         :return: None
         """
-        if not isinstance(init_value, self.dtype):
+        if not self._trusted and not isinstance(init_value, self.dtype):
             raise TypeError(f"Expected type {self.dtype}, got {type(init_value)} instead")
         self._init_value = init_value
+        self._version += 1
 
     def set(self, value: Any) -> None:
         """
@@ -118,15 +176,62 @@ class ValueEnvModule(EnvModule):
         :param value: Set new value
         :return: None
         """
-        if not isinstance(value, self.dtype):
+        if not self._trusted and not isinstance(value, self.dtype):
             raise TypeError(f"Expected type {self.dtype}, got {type(value)} instead")
         self._prev_value = self.value
         self._value = value
+        self._version += 1
 
     def reset(self) -> None:
         """Assigns `init_value` to value and `prev_value`."""
         self._prev_value = self.init_value
         self._value = self.init_value
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        """
+        Counter, that is increased whenever the value might have changed (e.g. by :func:`set` and :func:`reset`).
+        It never decreases, so modules, that derive their value from other modules, can cache their result
+        until the version of an input changes. Subclasses, that change their value without calling :func:`set`,
+        must call :func:`touch`.
+        """
+        return self._version
+
+    def touch(self) -> None:
+        """Marks the value as changed by increasing :attr:`version`."""
+        self._version += 1
+
+    def _derived_version(self, inputs) -> int:
+        """
+        Version of a module, whose value is derived from `inputs`. Increases :attr:`version`, if the version
+        of an input changed since the last call.
+
+        :param inputs: Input modules
+        :type inputs: Iterable[:class:`wacky_envs.ValueEnvModule`]
+
+        :return: Current version
+        :rtype: int
+        """
+        key = tuple(module.version for module in inputs)
+        if key != self._inputs_key:
+            self._inputs_key = key
+            self._version += 1
+        return self._version
+
+    def _memo(self, compute) -> Any:
+        """
+        Returns the cached result of `compute`, if :attr:`version` did not change since it was computed.
+
+        :param compute: Function without arguments, that computes the value
+
+        :return: (Cached) value
+        """
+        version = self.version
+        if version != self._memo_version:
+            self._memo_value = compute()
+            self._memo_version = version
+        return self._memo_value
 
     @property
     def value(self) -> Any:
@@ -0,0 +1,200 @@
+import random
+import types
+from collections import deque
+from typing import Iterable, List
+
+import numpy as np
+
+from wacky_envs.env_module import EnvModule, ValueEnvModule
+
+
+def is_container(obj) -> bool:
+    """
+    True for objects, that are not modules, but whose attributes may hold modules (e.g. a
+    :class:`wacky_envs.steppers.SubSteps` in :attr:`wacky_envs.WackyEnv.call_modules`).
+    """
+    return hasattr(obj, '__dict__') and not isinstance(
+        obj, (EnvModule, type, types.ModuleType, types.FunctionType, types.MethodType)
+    )
+
+
+def collect_modules(roots: Iterable) -> List[EnvModule]:
+    """
+    Collects all environment modules that are reachable from `roots`, including modules referenced by other
+    modules (e.g. bounds of a :class:`wacky_envs.numbers.FloatConstr` or the variables of a
+    :class:`wacky_envs.numbers.WackyMath`).
+
+    :param roots: Modules, lists of modules or `None`
+    :type roots: Iterable
+
+    :return: Each module once, in the order they were found
+    :rtype: List[:class:`wacky_envs.EnvModule`]
+    """
+    found, visited = {}, set()
+    stack = list(roots)[::-1]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, EnvModule):
+            if id(obj) in found:
+                continue
+            found[id(obj)] = obj
+            stack.extend(list(vars(obj).values())[::-1])
+        elif isinstance(obj, (list, tuple, set)):
+            stack.extend(list(obj)[::-1])
+        elif isinstance(obj, dict):
+            stack.extend(list(obj.values())[::-1])
+        elif is_container(obj) and id(obj) not in visited:
+            visited.add(id(obj))
+            stack.extend(list(vars(obj).values())[::-1])
+    return list(found.values())
+
+
+_NONE, _FLOAT, _INT, _BOOL = 0.0, 1.0, 2.0, 3.0
+_DECODE = {_NONE: lambda _: None, _FLOAT: float, _INT: int, _BOOL: bool}
+
+_NP_RNG_SIZE = 624 + 3
+_PY_RNG_SIZE = 625 + 2
+
+
+def _pack_scalar(value, buf: np.ndarray, offset: int) -> None:
+    """Writes a type code and the value of a scalar (None, bool, int or float) into `buf`."""
+    if value is None:
+        buf[offset], buf[offset + 1] = _NONE, 0.0
+    elif isinstance(value, (bool, np.bool_)):
+        buf[offset], buf[offset + 1] = _BOOL, value
+    elif isinstance(value, (int, np.integer)):
+        buf[offset], buf[offset + 1] = _INT, value
+    elif isinstance(value, (float, np.floating)):
+        buf[offset], buf[offset + 1] = _FLOAT, value
+    else:
+        raise TypeError(f'Cannot store state of type {type(value)}.')
+
+
+def _unpack_scalar(buf: np.ndarray, offset: int):
+    """Reads a scalar written by :func:`_pack_scalar`."""
+    return _DECODE[buf[offset]](buf[offset + 1])
+
+
+def _restore_in_place(module: EnvModule, attr: str, current: np.ndarray) -> bool:
+    """True, if the state array `attr` of `module` can be overwritten without changing other values."""
+    if isinstance(getattr(type(module), attr, None), property) or not current.flags.writeable:
+        return False
+    return not any(
+        isinstance(value, np.ndarray) and np.may_share_memory(value, current)
+        for name, value in vars(module).items() if name != attr
+    )
+
+
+class StateLayout:
+    """
+    Layout of the mutable state of environment modules in one flat float64 buffer.
+
+    The state attributes of each module are listed in :attr:`wacky_envs.EnvModule.state_attrs`.
+    Scalars take two slots (type code and value), arrays take one slot per element and deques
+    take two slots per element. The layout is fixed on construction, so arrays and deques must keep their size.
+    Arrays are restored in place, unless they are read-only, properties or share memory with another attribute
+    of the module (e.g. `_value` and `_prev_value` after a reset).
+    """
+
+    def __init__(self, modules: List[EnvModule], rng: bool = True):
+        """
+        Builds the layout from the current state of `modules`.
+
+        :param modules: Modules, whose state is stored
+        :type modules: List[:class:`wacky_envs.EnvModule`]
+
+        :param rng: Also stores the state of the global `numpy` and `random` generators (optional).
+        :type rng: bool
+        """
+        self.rng = rng
+        self.entries = []
+        offset = 0
+        for module in modules:
+            for attr in module.state_attrs:
+                if not hasattr(module, attr):
+                    continue
+                value = getattr(module, attr)
+                if isinstance(value, np.ndarray):
+                    entry = ('array', module, attr, offset, value.size, (value.shape, value.dtype))
+                elif isinstance(value, deque):
+                    entry = ('deque', module, attr, offset, 2 * value.maxlen, value.maxlen)
+                else:
+                    _pack_scalar(value, np.zeros(2), 0)
+                    entry = ('scalar', module, attr, offset, 2, None)
+                self.entries.append(entry)
+                offset += entry[4]
+        self.size = offset + (_NP_RNG_SIZE + _PY_RNG_SIZE if rng else 0)
+
+    def gather(self, out: np.ndarray = None) -> np.ndarray:
+        """
+        Copies the current state into a flat buffer.
+
+        :param out: Buffer of size :attr:`size` (optional). A new buffer is allocated if `None`.
+        :type out: np.ndarray
+
+        :return: Flat state buffer
+        :rtype: np.ndarray
+        """
+        buf = np.zeros(self.size) if out is None else out
+        for kind, module, attr, offset, size, extra in self.entries:
+            value = getattr(module, attr)
+            if kind == 'scalar':
+                _pack_scalar(value, buf, offset)
+            elif kind == 'array':
+                if value.size != size:
+                    raise ValueError(f'Size of {module.classname}.{attr} changed from {size} to {value.size}.')
+                buf[offset:offset + size] = value.reshape(-1)
+            else:
+                buf[offset:offset + size] = np.nan
+                for i, item in enumerate(value):
+                    _pack_scalar(item, buf, offset + 2 * i)
+        if self.rng:
+            self._gather_rng(buf[self.size - _NP_RNG_SIZE - _PY_RNG_SIZE:])
+        return buf
+
+    def scatter(self, buf: np.ndarray) -> None:
+        """
+        Restores the state from a flat buffer created by :func:`StateLayout.gather`.
+
+        :param buf: Flat state buffer
+        :type buf: np.ndarray
+        """
+        if len(buf) != self.size:
+            raise ValueError(f'Expected state of size {self.size}, got {len(buf)} instead.')
+        for kind, module, attr, offset, size, extra in self.entries:
+            if kind == 'scalar':
+                setattr(module, attr, _unpack_scalar(buf, offset))
+            elif kind == 'array':
+                shape, dtype = extra
+                current = getattr(module, attr)
+                if _restore_in_place(module, attr, current):
+                    # Views of the array (e.g. the history of a HistoryObs) stay valid:
+                    np.copyto(current, buf[offset:offset + size].reshape(shape), casting='unsafe')
+                else:
+                    setattr(module, attr, buf[offset:offset + size].reshape(shape).astype(dtype))
+            else:
+                items = getattr(module, attr)
+                items.clear()
+                items.extend(
+                    _unpack_scalar(buf, i) for i in range(offset, offset + size, 2) if not np.isnan(buf[i])
+                )
+            if isinstance(module, ValueEnvModule):
+                module.touch()
+        if self.rng:
+            self._scatter_rng(buf[self.size - _NP_RNG_SIZE - _PY_RNG_SIZE:])
+
+    @staticmethod
+    def _gather_rng(buf: np.ndarray) -> None:
+        _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+        buf[:624] = keys
+        buf[624:627] = pos, has_gauss, cached_gaussian
+        version, internal, gauss_next = random.getstate()
+        buf[627:1252] = internal
+        _pack_scalar(gauss_next, buf, 1252)
+
+    @staticmethod
+    def _scatter_rng(buf: np.ndarray) -> None:
+        keys = buf[:624].astype(np.uint32)
+        np.random.set_state(('MT19937', keys, int(buf[624]), int(buf[625]), float(buf[626])))
+        internal = tuple(int(x) for x in buf[627:1252])
+        random.setstate((3, internal, _unpack_scalar(buf, 1252)))
@@ -0,0 +1,156 @@
+import copy
+from collections import deque
+from typing import List
+
+import numpy as np
+
+from wacky_envs.env import WackyEnv
+from wacky_envs.env_module import EnvModule
+from wacky_envs.env_state import is_container
+from wacky_envs.numbers import NumberArena
+
+_MUTABLE_TYPES = (np.ndarray, list, dict, set, deque)
+"""Attribute values of these types are copied for each clone (unless listed in `shared_attrs`)."""
+
+
+def _contains_module(value, visited: set = None) -> bool:
+    if isinstance(value, (EnvModule, NumberArena)):
+        return True
+    elif isinstance(value, (list, tuple, set)):
+        return any(_contains_module(v, visited) for v in value)
+    elif isinstance(value, dict):
+        return any(_contains_module(v, visited) for v in value.values())
+    elif is_container(value):
+        visited = set() if visited is None else visited
+        if id(value) in visited:
+            return False
+        visited.add(id(value))
+        return any(_contains_module(v, visited) for v in vars(value).values())
+    return False
+
+
+def _remap(value, mapping: dict):
+    """
+    Replaces modules and arenas (also inside lists, tuples, sets, dicts and attributes of other objects)
+    with their clones. Objects holding modules are copied once per clone.
+    """
+    if isinstance(value, (EnvModule, NumberArena)):
+        return mapping.get(id(value), value)
+    elif is_container(value):
+        if id(value) not in mapping:
+            if not _contains_module(value):
+                return value
+            new = copy.copy(value)
+            mapping[id(value)] = new
+            for attr, v in vars(new).items():
+                new.__dict__[attr] = _remap(v, mapping)
+        return mapping[id(value)]
+    elif isinstance(value, list):
+        return [_remap(v, mapping) for v in value]
+    elif isinstance(value, tuple):
+        return tuple(_remap(v, mapping) for v in value)
+    elif isinstance(value, set):
+        return {_remap(v, mapping) for v in value}
+    elif isinstance(value, dict):
+        return {k: _remap(v, mapping) for k, v in value.items()}
+    return value
+
+
+def _clone_plan(obj, shared_attrs: tuple = ()) -> tuple:
+    """Attribute names that must be remapped to clones and attribute names that must be copied."""
+    remap_attrs, copy_attrs = [], []
+    for attr, value in vars(obj).items():
+        if _contains_module(value):
+            remap_attrs.append(attr)
+        elif isinstance(value, _MUTABLE_TYPES) and attr not in shared_attrs:
+            copy_attrs.append(attr)
+    return tuple(remap_attrs), tuple(copy_attrs)
+
+
+class EnvTemplate:
+    """
+    Captures the module graph of a built :class:`wacky_envs.WackyEnv` and stamps out independent clones.
+
+    Constructing an environment by hand calls every :func:`EnvModule.__init__` again. A template analyses
+    the graph once and then clones it by copying the attribute dict of each module: References to other modules
+    are replaced by their clones, mutable values (the :attr:`EnvModule.state_attrs`, arrays, lists, ect.)
+    are copied and everything else is shared. Attributes listed in :attr:`EnvModule.shared_attrs`
+    (e.g. dataframes and the support of :class:`wacky_envs.actions.AtomizedAction`) are always shared.
+    Compiled equations of :class:`wacky_envs.numbers.WackyMath` are rebound to the cloned variables
+    without compiling them again.
+
+    Each cloned module gets a new unique id and numbers attached to a :class:`wacky_envs.numbers.NumberArena`
+    are attached to a copy of the arena. Clones start from the current state of the template environment.
+    """
+
+    def __init__(self, env: WackyEnv):
+        """
+        Analyses the module graph of `env`.
+
+        :param env: Template environment. Must not be changed structurally after the template was created.
+        :type env: :class:`wacky_envs.WackyEnv`
+        """
+        self.env = env
+        self._modules = env.modules
+        self._plans = [_clone_plan(module, module.shared_attrs) for module in self._modules]
+        self._env_plan = _clone_plan(env, ('_frozen_calls', '_frozen_steps'))
+        self._arenas = list({
+            id(module._arena): module._arena for module in self._modules if '_arena_slot' in vars(module)
+        }.values())
+
+    @staticmethod
+    def _copy(obj, copy_attrs: tuple):
+        """Shallow copy of `obj`, where the attributes `copy_attrs` are copied as well."""
+        new = object.__new__(obj.__class__)
+        new_dict = new.__dict__
+        new_dict.update(obj.__dict__)
+        for attr in copy_attrs:
+            new_dict[attr] = copy.copy(new_dict[attr])
+        return new
+
+    def clone(self) -> WackyEnv:
+        """
+        Creates an independent copy of the template environment.
+
+        :return: Cloned environment
+        :rtype: :class:`wacky_envs.WackyEnv`
+        """
+        mapping = {id(arena): arena.copy() for arena in self._arenas}
+        clones = []
+        for module, plan in zip(self._modules, self._plans):
+            new = self._copy(module, plan[1])
+            new._id = next(EnvModule.newid)
+            mapping[id(module)] = new
+            clones.append(new)
+
+        for new, (remap_attrs, _) in zip(clones, self._plans):
+            new_dict = new.__dict__
+            for attr in remap_attrs:
+                new_dict[attr] = _remap(new_dict[attr], mapping)
+
+        for arena in self._arenas:
+            mapping[id(arena)].modules = [mapping.get(id(module), module) for module in arena.modules]
+
+        for new in clones:
+            new._cloned()
+
+        env = self._copy(self.env, self._env_plan[1])
+        for attr in self._env_plan[0]:
+            env.__dict__[attr] = _remap(env.__dict__[attr], mapping)
+        env._profiler = None
+        env._state_layout = None
+        if env.frozen:
+            env.freeze()
+        return env
+
+    def clone_many(self, n: int) -> List[WackyEnv]:
+        """
+        Creates `n` independent copies of the template environment.
+
+        :param n: Number of clones
+        :type n: int
+
+        :return: Cloned environments
+        :rtype: List[:class:`wacky_envs.WackyEnv`]
+        """
+        return [self.clone() for _ in range(n)]
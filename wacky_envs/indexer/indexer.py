@@ -20,13 +20,26 @@ class ByIndex(BaseIndexer):
 
     def set(self, indexer):
         self.indexer = indexer
+        self._inputs_key = None
+        self._version += 1
 
     @property
     def cur_idx(self):
         return self.indexer.value
 
+    @property
+    def version(self) -> int:
+        """Increases, if the version of :attr:`indexer` or of the current choice changed."""
+        cur_choice = self.cur_choice
+        if isinstance(cur_choice, ValueEnvModule):
+            return self._derived_version((self.indexer, cur_choice))
+        return self._derived_version((self.indexer,))
+
     @property
     def value(self):
+        return self._memo(self._choice_value)
+
+    def _choice_value(self):
         if isinstance(self.cur_choice, ValueEnvModule):
             return self.choices[self.indexer.value].value
         else:
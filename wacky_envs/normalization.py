@@ -0,0 +1,213 @@
+import numpy as np
+
+from wacky_envs.env_module import EnvModule
+
+
+class RunningMeanStd:
+    """
+    Running mean and variance (Welford's algorithm), updated in place in preallocated arrays.
+
+    Statistics of parallel workers can be combined with :func:`RunningMeanStd.merge`.
+    """
+
+    def __init__(self, shape: tuple = ()):
+        """
+        :param shape: Shape of the observed values (optional). Scalars by default.
+        :type shape: tuple
+        """
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self._delta = np.zeros(shape)
+        self._tmp = np.zeros(shape)
+
+    @property
+    def shape(self) -> tuple:
+        return self.mean.shape
+
+    @property
+    def var(self) -> np.ndarray:
+        """Variance of the values so far (ones, until there are two values)."""
+        if self.count < 2:
+            return np.ones(self.shape)
+        return self.m2 / self.count
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    def update(self, x) -> None:
+        """Adds one value."""
+        self.count += 1
+        delta, tmp = self._delta, self._tmp
+        np.subtract(x, self.mean, out=delta)
+        np.multiply(delta, 1.0 / self.count, out=tmp)
+        self.mean += tmp
+        # m2 += (x - old mean) * (x - new mean) = delta * delta * (count - 1) / count
+        np.multiply(delta, tmp, out=tmp)
+        tmp *= self.count - 1
+        self.m2 += tmp
+
+    def merge(self, other: 'RunningMeanStd') -> None:
+        """
+        Adds the values of `other` (e.g. the statistics of another worker).
+
+        :param other: Statistics of the same shape
+        :type other: :class:`RunningMeanStd`
+        """
+        if other.shape != self.shape:
+            raise ValueError(f'Expected statistics of shape {self.shape}, got {other.shape} instead.')
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta ** 2 * (self.count * other.count / count)
+        self.mean += delta * (other.count / count)
+        self.count = count
+
+    def copy(self) -> 'RunningMeanStd':
+        new = RunningMeanStd(self.shape)
+        new.merge(self)
+        return new
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(shape={self.shape}, count={self.count})"
+
+
+class _Normalizer:
+    """Statistics, freezing and cloning, shared by :class:`NormReward` and :class:`wacky_envs.observations.NormObs`."""
+
+    _stats: RunningMeanStd
+    _frozen: bool
+
+    @property
+    def stats(self) -> RunningMeanStd:
+        """Running statistics."""
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats: RunningMeanStd) -> None:
+        if stats.shape != self._stats.shape:
+            raise ValueError(f'Expected statistics of shape {self._stats.shape}, got {stats.shape} instead.')
+        self._stats = stats
+
+    @property
+    def frozen(self) -> bool:
+        """If True, :attr:`stats` are not updated (e.g. for evaluation)."""
+        return self._frozen
+
+    def freeze(self) -> None:
+        self._frozen = True
+
+    def unfreeze(self) -> None:
+        self._frozen = False
+
+    def _cloned(self) -> None:
+        # Each clone collects its own statistics (see RunningMeanStd.merge):
+        self._stats = self._stats.copy()
+
+    @property
+    def _stats_count(self) -> int:
+        """Number of values in :attr:`stats` (see :attr:`wacky_envs.EnvModule.state_attrs`)."""
+        return self._stats.count
+
+    @_stats_count.setter
+    def _stats_count(self, count: int) -> None:
+        self._stats.count = int(count)
+
+    @property
+    def _stats_mean(self) -> np.ndarray:
+        return self._stats.mean
+
+    @_stats_mean.setter
+    def _stats_mean(self, mean: np.ndarray) -> None:
+        self._stats.mean[...] = mean
+
+    @property
+    def _stats_m2(self) -> np.ndarray:
+        return self._stats.m2
+
+    @_stats_m2.setter
+    def _stats_m2(self, m2: np.ndarray) -> None:
+        self._stats.m2[...] = m2
+
+
+class NormReward(_Normalizer, EnvModule):
+    """
+    Scales the output of a reward module by a running standard deviation and clips it.
+
+    With `gamma`, the standard deviation of the discounted return is used (like most RL libraries do).
+    Then this module must be in :attr:`wacky_envs.WackyEnv.reset_modules`, to start a new return on reset.
+
+    The statistics are updated once per step by :func:`NormReward.step`, which :func:`wacky_envs.WackyEnv.step`
+    calls before the reward is read. Calling the module only scales the current reward.
+    """
+
+    state_attrs = ('_return', '_stats_count', '_stats_mean', '_stats_m2')
+
+    def __init__(
+            self,
+            reward: EnvModule,
+            gamma: float = None,
+            clip: float = 10.0,
+            center: bool = False,
+            epsilon: float = 1e-8,
+    ) -> None:
+        """
+        :param reward: Reward module, e.g. a :class:`wacky_envs.numbers.WackyMath`
+        :type reward: :class:`wacky_envs.EnvModule`
+
+        :param gamma: Discount factor of the return (optional). Scales by the standard deviation of the rewards
+            if not specified.
+        :type gamma: float
+
+        :param clip: Clips the scaled reward to [-clip, clip] (optional).
+        :type clip: float
+
+        :param center: Also subtracts the running mean of the rewards (optional). Only without `gamma`.
+        :type center: bool
+
+        :param epsilon: Added to the variance (optional).
+        :type epsilon: float
+        """
+        super(NormReward, self).__init__()
+        if center and gamma is not None:
+            raise ValueError('Centering is only possible without gamma.')
+        self._reward = reward
+        self.gamma = gamma
+        self.clip = clip
+        self.center = center
+        self.epsilon = epsilon
+        self._stats = RunningMeanStd()
+        self._frozen = False
+        self._return = 0.0
+
+    @property
+    def reward(self) -> EnvModule:
+        """Wrapped reward module."""
+        return self._reward
+
+    def reset(self) -> None:
+        self._return = 0.0
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        """Adds the reward of the current step (or the discounted return) to the statistics, unless frozen."""
+        if self._frozen:
+            return
+        reward = float(self._reward())
+        if self.gamma is None:
+            self._stats.update(reward)
+        else:
+            self._return = self._return * self.gamma + reward
+            self._stats.update(self._return)
+
+    def __call__(self) -> float:
+        reward = float(self._reward())
+        stats = self._stats
+        var = float(stats.m2) / stats.count if stats.count > 1 else 1.0
+        if self.center:
+            reward -= float(stats.mean)
+        reward /= (var + self.epsilon) ** 0.5
+        if self.clip is not None:
+            reward = min(max(reward, -self.clip), self.clip)
+        return reward
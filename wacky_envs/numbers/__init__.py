@@ -2,5 +2,7 @@ from wacky_envs.numbers._base_number import WackyNumber
 from wacky_envs.numbers.base_float import WackyFloat
 from wacky_envs.numbers.base_integer import WackyInt
 from wacky_envs.numbers.math_equation import WackyMath
+from wacky_envs.numbers.expression import Expr, expression_mode, runtime, where, minimum, maximum
 from wacky_envs.numbers.constr_float import FloatConstr
 from wacky_envs.numbers.constr_integers import IntConstr
+from wacky_envs.numbers.arena import NumberArena
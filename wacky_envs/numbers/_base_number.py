@@ -25,6 +25,12 @@ class WackyNumber(ValueEnvModule):
         """
         super(WackyNumber, self).__init__(init_value)
 
+    @property
+    def expr(self):
+        """Expression leaf of this number, to build lazy expressions (see :class:`wacky_envs.numbers.Expr`)."""
+        from wacky_envs.numbers.expression import Expr
+        return Expr.wrap(self)
+
     @staticmethod
     def read_other(x) -> [int, float]:
         """
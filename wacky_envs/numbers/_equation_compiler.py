@@ -0,0 +1,351 @@
+import ast
+import functools
+import operator
+import types
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from wacky_envs.env_module import ValueEnvModule
+
+
+RUNTIME_VARS = ('value', 't', 'delta_t', 'episode_delta_t')
+"""Variables that are passed to an equation at evaluation time (see :class:`wacky_envs.numbers.WackyMath`)."""
+
+SAFE_BUILTINS = {
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'round': round,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'sum': sum,
+    'len': len,
+    'pow': pow,
+    'any': any,
+    'all': all,
+}
+"""Builtin functions that can be used in compiled equations."""
+
+
+_INPLACE_OPS = {
+    ast.Add: ('_vec_iadd', np.add, operator.add),
+    ast.Sub: ('_vec_isub', np.subtract, operator.sub),
+    ast.Mult: ('_vec_imul', np.multiply, operator.mul),
+    ast.Div: ('_vec_itruediv', np.true_divide, operator.truediv),
+    ast.FloorDiv: ('_vec_ifloordiv', np.floor_divide, operator.floordiv),
+    ast.Mod: ('_vec_imod', np.remainder, operator.mod),
+    ast.Pow: ('_vec_ipow', np.power, operator.pow),
+}
+
+
+def _inplace(ufunc, fallback):
+    """
+    Binary operation, that writes into the buffer of its first operand, if it is a float64 array
+    of the output shape. Only used for intermediate results, which are not referenced anywhere else.
+    """
+    def func(x, y):
+        if x.__class__ is np.ndarray and x.dtype == np.float64:
+            try:
+                return ufunc(x, y, out=x)
+            except (ValueError, TypeError):
+                pass
+        return fallback(x, y)
+    return func
+
+
+def _reduce_or_elementwise(ufunc, reduce):
+    def func(*args):
+        if len(args) == 1:
+            return reduce(args[0], axis=-1)
+        return functools.reduce(ufunc, args)
+    return func
+
+
+VECTOR_BUILTINS = {
+    'abs': np.abs,
+    'min': _reduce_or_elementwise(np.minimum, np.min),
+    'max': _reduce_or_elementwise(np.maximum, np.max),
+    'round': np.round,
+    'int': lambda x: np.trunc(x).astype(np.int64),
+    'float': lambda x: np.asarray(x, dtype=np.float64),
+    'bool': lambda x: np.asarray(x, dtype=bool),
+    'sum': lambda x: np.sum(x, axis=-1),
+    'mean': lambda x: np.mean(x, axis=-1),
+    'any': lambda x: np.any(x, axis=-1),
+    'all': lambda x: np.all(x, axis=-1),
+    'len': len,
+    'pow': np.power,
+    '_vec_where': np.where,
+    '_vec_and': np.logical_and,
+    '_vec_or': np.logical_or,
+    '_vec_not': np.logical_not,
+    **{name: _inplace(ufunc, fallback) for name, ufunc, fallback in _INPLACE_OPS.values()},
+}
+"""
+Replacements for :attr:`SAFE_BUILTINS` if an equation is compiled for arrays. With two or more arguments
+`min` and `max` are elementwise, with one argument they reduce the last axis (like `sum`, `mean`, `any` and `all`).
+"""
+
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.IfExp,
+    ast.Call,
+    ast.keyword,
+    ast.Name,
+    ast.Attribute,
+    ast.Subscript,
+    ast.Slice,
+    ast.Constant,
+    ast.Tuple,
+    ast.List,
+    ast.operator,
+    ast.unaryop,
+    ast.boolop,
+    ast.cmpop,
+    ast.expr_context,
+)
+
+
+class _Validator(ast.NodeVisitor):
+    """Rejects everything that is not plain math (no lambdas, comprehensions, private attributes, ect.)."""
+
+    def generic_visit(self, node):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise SyntaxError(f'Not allowed in compiled equations: {node.__class__.__name__}')
+        super(_Validator, self).generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id.startswith('__'):
+            raise SyntaxError(f'Not allowed in compiled equations: {node.id}')
+
+    def visit_Attribute(self, node):
+        if node.attr.startswith('_'):
+            raise SyntaxError(f'Not allowed in compiled equations: .{node.attr}')
+        self.visit(node.value)
+
+
+class _ValueReader(ast.NodeTransformer):
+    """Replaces variables that are modules with a direct read of their :attr:`value`."""
+
+    def __init__(self, module_names):
+        self.module_names = module_names
+
+    def visit_Name(self, node):
+        if node.id in self.module_names:
+            return ast.copy_location(ast.Attribute(value=node, attr='value', ctx=ast.Load()), node)
+        return node
+
+    def visit_Attribute(self, node):
+        # Attributes of modules (e.g. `a.prev_value`) are read from the module itself.
+        if not isinstance(node.value, ast.Name):
+            node.value = self.visit(node.value)
+        return node
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name):
+            node.func = self.visit(node.func)
+        node.args = [self.visit(arg) for arg in node.args]
+        node.keywords = [self.visit(kw) for kw in node.keywords]
+        return node
+
+
+class _Vectorizer(ast.NodeTransformer):
+    """Rewrites Python control flow of an equation into elementwise numpy operations."""
+
+    @staticmethod
+    def _call(name, args, node):
+        return ast.copy_location(ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[]), node)
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        return self._call('_vec_where', [node.test, node.body, node.orelse], node)
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        name = '_vec_and' if isinstance(node.op, ast.And) else '_vec_or'
+        return functools.reduce(lambda a, b: self._call(name, [a, b], node), node.values)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return self._call('_vec_not', [node.operand], node)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        # Chained comparisons (a < b < c) are split into (a < b) & (b < c):
+        lefts = [node.left] + node.comparators[:-1]
+        pairs = [
+            ast.copy_location(ast.Compare(left=left, ops=[op], comparators=[right]), node)
+            for left, op, right in zip(lefts, node.ops, node.comparators)
+        ]
+        return functools.reduce(lambda a, b: self._call('_vec_and', [a, b], node), pairs)
+
+
+class _InPlacer(ast.NodeTransformer):
+    """
+    Rewrites arithmetic on intermediate results into in-place operations (see :func:`_inplace`),
+    so a chain like `(a + b) * c - d` allocates one array instead of three.
+    """
+
+    _FRESH_CALLS = {'_vec_where'} | {name for name, _, _ in _INPLACE_OPS.values()}
+
+    def _is_fresh(self, node) -> bool:
+        if isinstance(node, (ast.BinOp, ast.Compare)):
+            return True
+        elif isinstance(node, ast.UnaryOp):
+            return isinstance(node.op, ast.USub)
+        elif isinstance(node, ast.Call):
+            return isinstance(node.func, ast.Name) and node.func.id in self._FRESH_CALLS
+        return False
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if type(node.op) in _INPLACE_OPS and self._is_fresh(node.left):
+            name = _INPLACE_OPS[type(node.op)][0]
+            return ast.copy_location(
+                ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=[node.left, node.right], keywords=[]), node
+            )
+        return node
+
+
+def equation_names(equation: str) -> Tuple[str, ...]:
+    """
+    Variable names used in an equation.
+
+    :param equation: An equation in string format.
+    :type equation: str
+
+    :return: Sorted tuple of all variable names
+    :rtype: tuple
+    """
+    tree = ast.parse(equation.strip(), mode='eval')
+    return tuple(sorted({node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}))
+
+
+def equation_attributes(equation: str) -> Tuple[str, ...]:
+    """
+    Attribute names used in an equation.
+
+    :param equation: An equation in string format.
+    :type equation: str
+
+    :return: Sorted tuple of all attribute names
+    :rtype: tuple
+    """
+    tree = ast.parse(equation.strip(), mode='eval')
+    return tuple(sorted({node.attr for node in ast.walk(tree) if isinstance(node, ast.Attribute)}))
+
+
+def equation_uses_bool_ops(equation: str) -> bool:
+    """
+    True, if an equation uses `and` or `or`. These return one of their operands, but elementwise
+    (with `vectorize=True`) they return booleans, so the outputs can differ.
+
+    :param equation: An equation in string format.
+    :type equation: str
+
+    :rtype: bool
+    """
+    tree = ast.parse(equation.strip(), mode='eval')
+    return any(isinstance(node, ast.BoolOp) for node in ast.walk(tree))
+
+
+def compile_equation(
+        equation: str,
+        var_dict: Dict,
+        vectorize: bool = False,
+        module_types: Tuple[type, ...] = (ValueEnvModule,),
+) -> Callable:
+    """
+    Parses an equation into a restricted AST and compiles it once into a function.
+
+    Variables of :attr:`var_dict` are resolved at compile time. Variables that are modules
+    (:class:`wacky_envs.ValueEnvModule` or :attr:`module_types`) are read with `.value` on each call, so no copies are needed.
+    All other variables (e.g. `value`, `t`, `delta_t`, `episode_delta_t`, `x`) are keyword arguments
+    of the returned function, defaulting to their entry in :attr:`var_dict` if there is one.
+    Unused keyword arguments are ignored.
+
+    With `vectorize=True` the equation is compiled for numpy arrays: Conditional expressions, `and`, `or`,
+    `not` and chained comparisons become elementwise operations and the builtins are replaced
+    with :attr:`VECTOR_BUILTINS`. Arithmetic on intermediate results is done in place.
+
+    :param equation: An equation in string format.
+    :type equation: str
+
+    :param var_dict: Dictionary, where keys are variable names of the equation.
+    :type var_dict: dict
+
+    :param vectorize: Compiles the equation for numpy arrays (optional).
+    :type vectorize: bool
+
+    :param module_types: Variables of these types are read with `.value` (optional).
+    :type module_types: tuple
+
+    :return: Function that calculates the output of the equation
+    :rtype: Callable
+    """
+    tree = ast.parse(equation.strip(), mode='eval')
+    _Validator().visit(tree)
+
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    module_names = {
+        name for name in names
+        if name not in RUNTIME_VARS and isinstance(var_dict.get(name), module_types)
+    }
+    builtins = VECTOR_BUILTINS if vectorize else SAFE_BUILTINS
+    params = sorted(name for name in names - module_names if name not in builtins or name in var_dict)
+
+    scope = {'__builtins__': builtins}
+    scope.update({name: var_dict[name] for name in module_names})
+
+    args = []
+    for name in params:
+        if name in var_dict:
+            scope[f'_default_{name}'] = var_dict[name]
+            args.append(f'{name}=_default_{name}')
+        else:
+            args.append(name)
+
+    signature = ', '.join(['*'] + args + ['**_']) if args else '**_'
+
+    # Parse a lambda template and insert the (transformed) equation as its body:
+    template = ast.parse(f'lambda {signature}: None', mode='eval')
+    body = _ValueReader(module_names).visit(tree.body)
+    template.body.body = _InPlacer().visit(_Vectorizer().visit(body)) if vectorize else body
+    ast.fix_missing_locations(template)
+    return eval(compile(template, f'<WackyMath: {equation}>', 'eval'), scope)
+
+
+def rebind_equation(func: Callable, var_dict: Dict) -> Callable:
+    """
+    Creates a copy of a function compiled by :func:`compile_equation`, which reads the variables of another
+    :attr:`var_dict` with the same keys. The equation is not parsed or compiled again.
+
+    :param func: Function returned by :func:`compile_equation`
+    :type func: Callable
+
+    :param var_dict: Dictionary, where keys are variable names of the equation.
+    :type var_dict: dict
+
+    :return: Function that calculates the output of the equation
+    :rtype: Callable
+    """
+    scope = {'__builtins__': func.__globals__['__builtins__']}
+    for key in func.__globals__:
+        if key == '__builtins__':
+            continue
+        scope[key] = var_dict[key[len('_default_'):]] if key.startswith('_default_') else var_dict[key]
+
+    new_func = types.FunctionType(func.__code__, scope, func.__name__, func.__defaults__, func.__closure__)
+    if func.__kwdefaults__ is not None:
+        new_func.__kwdefaults__ = {name: var_dict[name] for name in func.__kwdefaults__}
+    return new_func
@@ -0,0 +1,150 @@
+import numpy as np
+from typing import Iterable
+
+from wacky_envs.numbers import WackyNumber
+
+
+class _ArenaSlot:
+    """Data descriptor, that reads and writes an attribute of a number in an array of :class:`NumberArena`."""
+
+    def __init__(self, array_name: str):
+        self.array_name = array_name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj._arena_cast(getattr(obj._arena, self.array_name)[obj._arena_slot])
+
+    def __set__(self, obj, value):
+        getattr(obj._arena, self.array_name)[obj._arena_slot] = value
+
+
+def _is_attached(module) -> bool:
+    return '_arena_slot' in vars(module)
+
+
+def _new_attached(module_class: type):
+    """Creates an attached number of `module_class` when unpickling (with the arena subclass of this process)."""
+    return object.__new__(NumberArena._arena_class(module_class))
+
+
+def _reduce_attached(module, protocol):
+    # The arena subclass can not be found by its name, so the original class is pickled instead.
+    # The values are restored with the arena, which is part of the state:
+    return _new_attached, (module.__class__.__bases__[0],), vars(module)
+
+
+class NumberArena:
+    """
+    Stores the current and previous values of numbers (:class:`wacky_envs.numbers.WackyNumber`) in two contiguous
+    float64 arrays :attr:`values` and :attr:`prev_values`. Each attached number reads and writes its slot in
+    these arrays, so observing, logging or copying the values of many numbers becomes an array operation.
+
+    Attached numbers keep their class name and behaviour. Integers are stored as floats
+    and converted back to `int` when read (exact up to 2**53).
+    """
+
+    _classes = {}
+
+    def __init__(self, capacity: int = 64):
+        """
+        Allocates the arrays.
+
+        :param capacity: Initial number of slots (optional). The arrays grow if needed.
+        :type capacity: int
+        """
+        self.values = np.zeros(capacity)
+        self.prev_values = np.zeros(capacity)
+        self.modules = []
+
+    def __len__(self):
+        return len(self.modules)
+
+    @classmethod
+    def _arena_class(cls, module_class: type) -> type:
+        if module_class not in cls._classes:
+            # Subclass with the same name, that stores _value and _prev_value in the arena:
+            cls._classes[module_class] = type(module_class.__name__, (module_class,), {
+                '__module__': module_class.__module__,
+                '__qualname__': module_class.__qualname__,
+                '_value': _ArenaSlot('values'),
+                '_prev_value': _ArenaSlot('prev_values'),
+                '__reduce_ex__': _reduce_attached,
+            })
+        return cls._classes[module_class]
+
+    def _grow(self, size: int) -> None:
+        capacity = max(size, 2 * len(self.values))
+        self.values = np.concatenate([self.values, np.zeros(capacity - len(self.values))])
+        self.prev_values = np.concatenate([self.prev_values, np.zeros(capacity - len(self.prev_values))])
+
+    def attach(self, modules: Iterable[WackyNumber]) -> np.ndarray:
+        """
+        Moves the values of `modules` into the arena. Modules that are already attached to this arena are skipped.
+
+        :param modules: Numbers to attach
+        :type modules: Iterable[:class:`wacky_envs.numbers.WackyNumber`]
+
+        :return: Slot index of each module
+        :rtype: np.ndarray
+        """
+        slots = []
+        for module in modules:
+            if not isinstance(module, WackyNumber):
+                raise TypeError(f'Expected type: WackyNumber. Got {type(module)} instead.')
+            if _is_attached(module):
+                if module._arena is not self:
+                    raise ValueError(f'{module.classname}(id={module.id}) is attached to another arena.')
+                slots.append(module._arena_slot)
+                continue
+
+            slot = len(self.modules)
+            if slot >= len(self.values):
+                self._grow(slot + 1)
+            value, prev_value = module.__dict__.pop('_value'), module.__dict__.pop('_prev_value')
+            module._arena = self
+            module._arena_slot = slot
+            module._arena_cast = int if module.dtype is int else float
+            module.__class__ = self._arena_class(module.__class__)
+            module._value, module._prev_value = value, prev_value
+            self.modules.append(module)
+            slots.append(slot)
+        return np.array(slots, dtype=np.int64)
+
+    def detach_all(self) -> None:
+        """Moves the values back into the modules and restores their original classes."""
+        for module in self.modules:
+            value, prev_value = module._value, module._prev_value
+            module.__class__ = module.__class__.__bases__[0]
+            del module._arena, module._arena_slot, module._arena_cast
+            module._value, module._prev_value = value, prev_value
+        self.modules = []
+
+    def index(self, modules: Iterable[WackyNumber]):
+        """
+        Index into :attr:`values` for `modules`. A slice if the slots are contiguous, otherwise an index array.
+
+        :param modules: Attached numbers
+        :type modules: Iterable[:class:`wacky_envs.numbers.WackyNumber`]
+
+        :return: Slice or index array
+        """
+        slots = []
+        for module in modules:
+            if not _is_attached(module) or module._arena is not self:
+                raise ValueError(f'{module.classname}(id={module.id}) is not attached to this arena.')
+            slots.append(module._arena_slot)
+        if slots and slots == list(range(slots[0], slots[0] + len(slots))):
+            return slice(slots[0], slots[0] + len(slots))
+        return np.array(slots, dtype=np.int64)
+
+    def copy(self) -> 'NumberArena':
+        """Copy of the arrays without attached modules (used when cloning environments)."""
+        new = NumberArena.__new__(NumberArena)
+        new.values = self.values.copy()
+        new.prev_values = self.prev_values.copy()
+        new.modules = []
+        return new
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(n_numbers={len(self.modules)})"
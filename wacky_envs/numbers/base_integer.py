@@ -25,7 +25,7 @@ class WackyInt(WackyNumber):
 
     def set(self, value: int) -> None:
         """Update current value."""
-        super(WackyInt, self).set(int(value))
+        super(WackyInt, self).set(value if value.__class__ is int else int(value))
 
     @property
     def value(self) -> int:
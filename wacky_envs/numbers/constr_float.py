@@ -4,7 +4,7 @@ from collections import deque
 
 from gym import spaces
 
-from wacky_envs.numbers import WackyFloat, WackyMath
+from wacky_envs.numbers import WackyFloat, WackyMath, Expr
 from wacky_envs.dataframes import FixStepperDataframe
 from wacky_envs.indexer import ByIndex
 
@@ -36,6 +36,8 @@ class FloatConstr(WackyFloat):
     op_time: float = field(default=0.0)
     delta_op_x: float = field(default=0.0)
 
+    state_attrs = ('_value', '_prev_value', 'op_x', 'op_time', 'delta_op_x', 'errors', '_prev_step_values')
+
     def __init__(
             self,
             init_value: float,
@@ -122,6 +124,8 @@ class FloatConstr(WackyFloat):
             return WackyFloat(val)
         elif isinstance(val, (WackyFloat, WackyMath)):
             return val
+        elif isinstance(val, Expr):
+            return val.compile()
         else:
             raise TypeError(f'Expected type: float, WackyFloat, WackyMath. Got {type(val)} instead.')
 
@@ -132,6 +136,8 @@ class FloatConstr(WackyFloat):
             return None
         elif isinstance(val, (WackyMath, FixStepperDataframe, ByIndex)):
             return val
+        elif isinstance(val, Expr):
+            return val.compile()
         else:
             raise TypeError(f'Expected type: WackyMath, DataframeFixStepper. Got {type(val)} instead.')
 
@@ -205,6 +211,27 @@ class FloatConstr(WackyFloat):
             self.to_accept_op_time = 0.0
             self.to_accept_op_x = x
 
+    def valid_deltas(self, x: np.ndarray) -> np.ndarray:
+        """
+        Checks many possible value changes at once, without changing anything.
+
+        :param x: Possible value changes
+        :type x: np.ndarray
+
+        :return: True for each change, that :func:`wacky_envs.numbers.FloatConstr.delta` accepts without an error signal
+        :rtype: np.ndarray
+        """
+        x = np.asarray(x)
+        if self.action_lock and (self.is_operating or self.is_waiting):
+            return np.zeros(x.shape, dtype=bool)
+
+        valid = np.ones(x.shape, dtype=bool)
+        if self.upperbound is not None:
+            valid &= ~((x > 0.0) & (self.value + x > self.upperbound.value))
+        if self.lowerbound is not None:
+            valid &= ~((x < 0.0) & (self.value - x < self.lowerbound.value))
+        return valid
+
     def accept(self, x, delta_t):
         """Accept the value change with the corresponding timeframe"""
         self.op_time = delta_t
@@ -216,11 +243,14 @@ class FloatConstr(WackyFloat):
         else:
             self.op_x = x
             self.delta_op_x = 0.0
+            # The operation changes the valid deltas (e.g. with action_lock):
+            self.touch()
 
     def wait(self, delta_t: float) -> None:
         """Set up waiting time with delta_t as the timeframe"""
         if not self.is_waiting and not self.is_operating:
             self.op_time = delta_t
+            self.touch()
 
     def step(self, t: float, delta_t: float, episode_delta_t: float) -> None:
         """Complete the accepted operation if current timeframe delta_t is <= the required operation time."""
@@ -233,6 +263,7 @@ class FloatConstr(WackyFloat):
                 self.op_time = 0.0
             else:
                 self.op_time -= delta_t
+                self.touch()
 
         if self.func_time is not None:
             self.set(float(self.func_time.take_step(self.value, t, delta_t, episode_delta_t)))
@@ -5,7 +5,7 @@ from collections import deque
 
 from gym import spaces
 
-from wacky_envs.numbers import WackyInt, WackyMath
+from wacky_envs.numbers import WackyInt, WackyMath, Expr
 
 
 @dataclass
@@ -40,6 +40,8 @@ class IntConstr(WackyInt):
     op_time: float = field(default=0.0)
     delta_x: int = field(default=0)
 
+    state_attrs = ('_value', '_prev_value', 'op_x', 'op_time', 'delta_op_x', 'errors', '_prev_step_values')
+
     def __init__(
             self,
             init_value: int,
@@ -130,6 +132,8 @@ class IntConstr(WackyInt):
             return WackyInt(val)
         elif isinstance(val, (WackyInt, WackyMath)):
             return val
+        elif isinstance(val, Expr):
+            return val.compile()
         else:
             raise TypeError(f'Expected type: int, WackyInt, WackyMath. Got {type(val)} instead.')
 
@@ -140,6 +144,8 @@ class IntConstr(WackyInt):
             return None
         elif isinstance(val, WackyMath):
             return val
+        elif isinstance(val, Expr):
+            return val.compile()
         else:
             raise TypeError(f'Expected type: WackyMath. Got {type(val)} instead.')
 
@@ -214,6 +220,27 @@ class IntConstr(WackyInt):
             self.to_accept_op_x = x
 
 
+    def valid_deltas(self, x: np.ndarray) -> np.ndarray:
+        """
+        Checks many possible value changes at once, without changing anything.
+
+        :param x: Possible value changes
+        :type x: np.ndarray
+
+        :return: True for each change, that :func:`wacky_envs.numbers.IntConstr.delta` accepts without an error signal
+        :rtype: np.ndarray
+        """
+        x = np.asarray(x)
+        if self.action_lock and (self.is_operating or self.is_waiting):
+            return np.zeros(x.shape, dtype=bool)
+
+        valid = np.ones(x.shape, dtype=bool)
+        if self.upperbound is not None:
+            valid &= ~((x > 0) & (self.value + x > self.upperbound.value))
+        if self.lowerbound is not None:
+            valid &= ~((x < 0) & (self.value - x < self.lowerbound.value))
+        return valid
+
     def accept(self, x, delta_t):
         """Accept the value change with the corresponding timeframe"""
         self.op_time = delta_t
@@ -225,11 +252,14 @@ class IntConstr(WackyInt):
         else:
             self.op_x = x
             self.delta_op_x = 0.0
+            # The operation changes the valid deltas (e.g. with action_lock):
+            self.touch()
 
     def wait(self, delta_t: float) -> None:
         """Set up waiting time with delta_t as the timeframe"""
         if not self.is_waiting and not self.is_operating:
             self.op_time = delta_t
+            self.touch()
 
     def step(self, t: float,  delta_t: float, episode_delta_t: float) -> None:
         """Complete the accepted operation if current timeframe delta_t is <= the required operation time."""
@@ -242,6 +272,7 @@ class IntConstr(WackyInt):
                 self.op_time = 0.0
             else:
                 self.op_time -= delta_t
+                self.touch()
 
         if self.func_time is not None:
             # TODO: If returned value was float, some of the time will be lost
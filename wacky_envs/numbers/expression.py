@@ -0,0 +1,264 @@
+import contextlib
+import math
+from typing import Dict, Tuple, Type
+
+from wacky_envs.env_module import ValueEnvModule
+from wacky_envs.numbers import WackyFloat, WackyInt, WackyMath
+from wacky_envs.numbers._equation_compiler import RUNTIME_VARS
+
+_BINARY_OPS = {
+    'add': '+', 'sub': '-', 'mul': '*', 'truediv': '/', 'floordiv': '//', 'mod': '%', 'pow': '**',
+}
+_COMPARE_OPS = {'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>=', 'eq': '==', 'ne': '!='}
+_UNARY_OPS = {'neg': '-', 'pos': '+'}
+
+
+class Expr:
+    """
+    Node of a lazy expression graph, built from arithmetic and comparisons of numbers
+    (:class:`wacky_envs.numbers.WackyNumber`), constants and other expressions.
+
+    Expressions are not evaluated when they are built. :func:`Expr.compile` turns an expression into a
+    compiled :class:`wacky_envs.numbers.WackyMath`, that can be used anywhere a `WackyMath` is accepted.
+    Start an expression with :attr:`WackyNumber.expr` or inside :func:`expression_mode`:
+
+    .. code-block:: python
+
+        income = ((soc.expr - lowerbound) * price).compile(dtype=float)
+
+        with expression_mode():
+            income = ((soc - lowerbound) * price).compile(dtype=float)
+    """
+
+    __slots__ = ('op', 'args')
+    __hash__ = object.__hash__
+
+    def __init__(self, op: str, args: tuple):
+        """
+        :param op: Kind of node: 'var', 'const', 'runtime', 'call', 'where' or an operator like '+' or '<'.
+        :type op: str
+
+        :param args: Module, constant or name for leafs, child nodes otherwise.
+        :type args: tuple
+        """
+        self.op = op
+        self.args = args
+
+    @classmethod
+    def wrap(cls, x) -> 'Expr':
+        """Converts a number, module or constant into an expression leaf. Expressions are returned as they are."""
+        if isinstance(x, Expr):
+            return x
+        elif isinstance(x, ValueEnvModule):
+            return cls('var', (x,))
+        elif isinstance(x, (bool, int, float)):
+            return cls('const', (x,))
+        else:
+            raise TypeError(f'Expected type: Expr, ValueEnvModule, int, float, bool. Got {type(x)} instead.')
+
+    @property
+    def dtype(self) -> type:
+        """Datatype of the result (bool, int or float), inferred from the leafs."""
+        if self.op in ('var', 'const'):
+            x = self.args[0]
+            dtype = x.dtype if isinstance(x, ValueEnvModule) else type(x)
+            return dtype if dtype in (bool, int) else float
+        elif self.op == 'runtime':
+            return int if self.args[0] == 't' else float
+        elif self.op in _COMPARE_OPS.values():
+            return bool
+        elif self.op == '/':
+            return float
+        elif self.op == 'where':
+            dtypes = {self.args[1].dtype, self.args[2].dtype}
+            return dtypes.pop() if len(dtypes) == 1 else float
+        elif self.op == 'call' and self.args[0] == 'abs':
+            return self.args[1].dtype
+        dtypes = [arg.dtype for arg in self.args if isinstance(arg, Expr)]
+        return int if all(dtype in (bool, int) for dtype in dtypes) else float
+
+    @property
+    def modules(self) -> Tuple[ValueEnvModule, ...]:
+        """Modules used in the expression, each once."""
+        found = {}
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.op == 'var':
+                found.setdefault(id(node.args[0]), node.args[0])
+            elif node.op not in ('const', 'runtime'):
+                stack.extend(arg for arg in node.args if isinstance(arg, Expr))
+        return tuple(found.values())
+
+    def _source(self, names: Dict[int, str], constants: Dict[str, object]) -> str:
+        """Writes the expression as equation string. Modules and special constants are added to the scope."""
+        if self.op == 'var':
+            module = self.args[0]
+            if id(module) not in names:
+                names[id(module)] = f'v{len(names)}'
+            return names[id(module)]
+        elif self.op == 'const':
+            x = self.args[0]
+            if isinstance(x, float) and not math.isfinite(x):
+                name = f'c{len(constants)}'
+                constants[name] = x
+                return name
+            return repr(x)
+        elif self.op == 'runtime':
+            return self.args[0]
+        elif self.op == 'call':
+            return f"{self.args[0]}({', '.join(arg._source(names, constants) for arg in self.args[1:])})"
+        elif self.op == 'where':
+            cond, x, y = (arg._source(names, constants) for arg in self.args)
+            return f'({x} if {cond} else {y})'
+        elif len(self.args) == 1:
+            return f'({self.op}{self.args[0]._source(names, constants)})'
+        left, right = (arg._source(names, constants) for arg in self.args)
+        return f'({left} {self.op} {right})'
+
+    def to_equation(self) -> Tuple[str, dict]:
+        """
+        Writes the expression as equation string for :class:`wacky_envs.numbers.WackyMath`.
+
+        :return: Equation and variable dictionary
+        :rtype: Tuple[str, dict]
+        """
+        names, constants = {}, {}
+        equation = self._source(names, constants)
+        modules = {id(module): module for module in self.modules}
+        var_dict = {name: modules[module_id] for module_id, name in names.items()}
+        var_dict.update(constants)
+        return equation, var_dict
+
+    def compile(self, dtype: Type = None, name: str = None, vectorized: bool = False) -> WackyMath:
+        """
+        Compiles the expression into a fused function.
+
+        :param dtype: Converts outputs to :attr:`dtype` if specified (optional).
+        :type dtype: type
+
+        :param name: Name of the module (optional)
+        :type name: str
+
+        :param vectorized: Compiles the expression for NumPy arrays (optional).
+        :type vectorized: bool
+
+        :return: Compiled equation, that reads the values of the modules directly
+        :rtype: :class:`wacky_envs.numbers.WackyMath`
+        """
+        equation, var_dict = self.to_equation()
+        return WackyMath(equation, var_dict, dtype=dtype, name=name, compiled=True, vectorized=vectorized)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_equation()[0]})"
+
+    def __bool__(self):
+        raise TypeError('The truth value of an Expr is unknown until it is compiled. Use where() for conditions.')
+
+
+def _binary(op: str, reflected: bool = False):
+    if reflected:
+        return lambda self, x: Expr(op, (Expr.wrap(x), Expr.wrap(self)))
+    return lambda self, x: Expr(op, (Expr.wrap(self), Expr.wrap(x)))
+
+
+def _unary(op: str):
+    return lambda self: Expr(op, (Expr.wrap(self),))
+
+
+_OPERATORS = {}
+for _name, _op in _BINARY_OPS.items():
+    _OPERATORS[f'__{_name}__'] = _binary(_op)
+    _OPERATORS[f'__r{_name}__'] = _binary(_op, reflected=True)
+for _name, _op in _COMPARE_OPS.items():
+    _OPERATORS[f'__{_name}__'] = _binary(_op)
+for _name, _op in _UNARY_OPS.items():
+    _OPERATORS[f'__{_name}__'] = _unary(_op)
+_OPERATORS['__abs__'] = lambda self: Expr('call', ('abs', Expr.wrap(self)))
+
+for _name, _func in _OPERATORS.items():
+    setattr(Expr, _name, _func)
+
+
+def runtime(name: str) -> Expr:
+    """
+    Expression leaf for a variable, that is passed at evaluation time (`value`, `t`, `delta_t` or `episode_delta_t`,
+    see :func:`WackyMath.take_step`).
+
+    :param name: One of :attr:`wacky_envs.numbers._equation_compiler.RUNTIME_VARS`
+    :type name: str
+
+    :return: Expression leaf
+    :rtype: :class:`Expr`
+    """
+    if name not in RUNTIME_VARS:
+        raise ValueError(f'Expected one of {RUNTIME_VARS}, got {name} instead.')
+    return Expr('runtime', (name,))
+
+
+def where(condition, x, y) -> Expr:
+    """
+    Conditional expression: `x` if `condition` else `y`.
+
+    :return: Expression
+    :rtype: :class:`Expr`
+    """
+    return Expr('where', (Expr.wrap(condition), Expr.wrap(x), Expr.wrap(y)))
+
+
+def minimum(*args) -> Expr:
+    """Smallest of the arguments."""
+    return Expr('call', ('min',) + tuple(Expr.wrap(x) for x in args))
+
+
+def maximum(*args) -> Expr:
+    """Largest of the arguments."""
+    return Expr('call', ('max',) + tuple(Expr.wrap(x) for x in args))
+
+
+@contextlib.contextmanager
+def expression_mode():
+    """
+    Inside this context, arithmetic and comparisons of :class:`wacky_envs.numbers.WackyFloat` and
+    :class:`wacky_envs.numbers.WackyInt` build expressions (:class:`Expr`) instead of returning numbers.
+
+    Note:
+        Dataclasses like :class:`wacky_envs.numbers.FloatConstr` define their own `==` and `!=`.
+        Use :attr:`WackyNumber.expr` for these comparisons.
+    """
+    patched = []
+    try:
+        for cls in (WackyFloat, WackyInt):
+            for name, func in _OPERATORS.items():
+                patched.append((cls, name, cls.__dict__.get(name)))
+                setattr(cls, name, func)
+        yield
+    finally:
+        for cls, name, func in reversed(patched):
+            if func is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, func)
+
+
+def main():
+    import timeit
+    from wacky_envs.numbers import FloatConstr
+
+    soc = FloatConstr(5.0, lowerbound=0.0, upperbound=10.0, name='soc')
+    price = FloatConstr(0.3, lowerbound=0.0, name='price')
+
+    income = ((soc.expr - 2.0) * price).compile(dtype=float)
+    with expression_mode():
+        penalty = where(soc > 2.0, 0.0, abs(soc - 2.0)).compile(dtype=float)
+    print(income.equation, income.value, penalty.equation, penalty.value)
+
+    string = WackyMath('(soc - 2.0) * price', {'soc': soc, 'price': price}, dtype=float)
+    n = 10000
+    for label, math_test in [('string', string), ('expr', income)]:
+        sec = timeit.timeit(lambda: math_test.take_step(soc.value, 1, 1.0, 1.0), number=n)
+        print(f'{label:>8}: {sec / n * 1e6:.2f} us per take_step')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,46 @@
 import copy
 from typing import Dict, Type
 
-from wacky_envs.env_module import ValueEnvModule
+import numpy as np
 
+from wacky_envs.env_module import EnvModule, ValueEnvModule
+from wacky_envs.numbers._equation_compiler import (
+    RUNTIME_VARS, compile_equation, rebind_equation, equation_names, equation_attributes, equation_uses_bool_ops
+)
+
+_TRACKED_ATTRS = ('value', 'prev_value', 'delta_value', 'init_value')
+"""Attributes of variables, that change the :attr:`ValueEnvModule.version` of the variable."""
 
-class WackyMath(ValueEnvModule):
-    """Allows implementing math."""
 
-    def __init__(self, equation: str, var_dict: Dict, dtype: Type = None, name: str = None):
+class WackyMath(ValueEnvModule):
+    """
+    Allows implementing math.
+
+    By default, the equation string is evaluated with :func:`eval` on a deep copy of :attr:`var_dict`
+    each time the output is needed. With `compiled=True` the equation is parsed once into a restricted
+    AST and compiled into a function, which reads the values of modules in :attr:`var_dict` directly.
+    Compiled equations only allow plain math (arithmetic, comparisons, conditional expressions,
+    calls to `abs`, `min`, `max`, `round`, ect. and public attributes of variables).
+    With `vectorized=True` the equation is compiled for NumPy arrays (e.g. values of :class:`wacky_envs.arrays.BaseArray`
+    or batched numbers): Conditional expressions, `and`, `or` and `not` become elementwise, `min`, `max`, `sum`,
+    `mean`, `any` and `all` of one argument reduce the last axis and outputs keep the shape of the inputs.
+
+    The output of :attr:`value` and :func:`__call__` (without additional variables) is cached until the
+    :attr:`version` of a variable or an entry of :attr:`var_dict` changes. Equations, that read other attributes
+    than `value`, `prev_value`, `delta_value` or `init_value` of a variable, that have a variable with a writable
+    array as value (which can change in place) or that convert outputs into a module (`dtype`),
+    are evaluated on every call.
+    """
+
+    def __init__(
+            self,
+            equation: str,
+            var_dict: Dict,
+            dtype: Type = None,
+            name: str = None,
+            compiled: bool = False,
+            vectorized: bool = False,
+    ):
         """
         Sets attributes.
 
@@ -22,12 +55,24 @@ class WackyMath(ValueEnvModule):
 
         :param dtype: Converts outputs to :attr:`dtype` if specified (optional).
         :type dtype: type
+
+        :param compiled: Compiles the equation once instead of evaluating the string on every call (optional).
+        :type compiled: bool
+
+        :param vectorized: Compiles the equation for NumPy arrays, implies `compiled` (optional).
+        :type vectorized: bool
         """
         super(WackyMath, self).__init__()
         self._name = name
         self._var_dict = var_dict
         self._equation = equation
         self._dtype = dtype
+        self._compiled = compiled or vectorized
+        self._vectorized = vectorized
+        self._func = compile_equation(equation, var_dict, vectorize=vectorized) if self._compiled else None
+        self._inputs = self._find_inputs()
+        self._var_key = self._var_dict_key()
+        self._table = None
 
     def __call__(self, additional_vars: dict = None) -> [float, int, bool]:
         """
@@ -39,10 +84,21 @@ class WackyMath(ValueEnvModule):
         :return: Output of the equation
         :rtype: Any or :attr:`dtype`
         """
+        if additional_vars is None:
+            return self.value
+        self._check_var_dict()
+        if self._compiled:
+            func = self._func
+            if any(name in func.__globals__ for name in additional_vars):
+                # Replaces modules of var_dict, which the compiled function reads directly:
+                func = compile_equation(
+                    self._equation, {**self._var_dict, **additional_vars}, vectorize=self._vectorized
+                )
+            return self._convert(func(**additional_vars))
+
         temp_dict = copy.deepcopy(self._var_dict)
-        if additional_vars is not None:
-            temp_dict.update(additional_vars)
-        return self._eval(copy.deepcopy(self._var_dict))
+        temp_dict.update(additional_vars)
+        return self._eval(temp_dict)
 
     @property
     def equation(self) -> str:
@@ -62,35 +118,186 @@ class WackyMath(ValueEnvModule):
         """Converts outputs of the equation if not `None`."""
         return self._dtype
 
+    @property
+    def compiled(self) -> bool:
+        """True, if the equation was compiled (see :func:`wacky_envs.numbers._equation_compiler.compile_equation`)."""
+        return self._compiled
+
+    @property
+    def vectorized(self) -> bool:
+        """True, if the equation was compiled for NumPy arrays."""
+        return self._vectorized
+
     def _eval(self, temp_dict) -> [float, int, bool]:
         """
         Calculates output of the equation.
 
         :param temp_dict: (Modified) copy of :attr:`var_dict`
 
+        :return: Output of the equation
+        :rtype: Any or :attr:`dtype`
+        """
+        return self._convert(eval(self.equation, temp_dict))
+
+    def _convert(self, output) -> [float, int, bool]:
+        """
+        Converts an output of the equation to :attr:`dtype`.
+
+        :param output: Output of the equation
+
         :return: Output of the equation
         :rtype: Any or :attr:`dtype`
         """
         if self._dtype is None:
-            return eval(self.equation, temp_dict)
+            return output
         elif self._dtype is int or self._dtype is float:
-            return self._dtype(eval(self.equation, temp_dict))
+            if self._vectorized:
+                return np.asarray(output, dtype=self._dtype)
+            return self._dtype(output)
         elif isinstance(self._dtype, ValueEnvModule):
-            self._dtype.set(eval(self.equation, temp_dict))
+            self._dtype.set(output)
             return self._dtype.value
         else:
             raise TypeError(f'Unknown dtype: {self._dtype}.')
 
+    def _find_inputs(self) -> [tuple, None]:
+        """Modules of :attr:`var_dict`, if the output only depends on their values. Otherwise `None`."""
+        if isinstance(self._dtype, ValueEnvModule):
+            return None
+        try:
+            names, attributes = equation_names(self._equation), equation_attributes(self._equation)
+        except SyntaxError:
+            return None
+        if any(name in RUNTIME_VARS and name not in self._var_dict for name in names):
+            return None
+        if any(attr not in _TRACKED_ATTRS for attr in attributes):
+            return None
+        inputs = []
+        for v in self._var_dict.values():
+            if isinstance(v, ValueEnvModule):
+                value = v.value
+                if isinstance(value, np.ndarray) and value.flags.writeable:
+                    return None
+                inputs.append(v)
+            elif not isinstance(v, (int, float, bool, str, type(None))):
+                return None
+        return tuple(inputs)
+
+    def _var_dict_key(self) -> tuple:
+        """Snapshot of :attr:`var_dict`: Constants by value, modules and other objects by identity."""
+        return tuple(
+            (k, v) if isinstance(v, (int, float, bool, str, type(None))) else (k, id(v))
+            for k, v in self._var_dict.items()
+        )
+
+    def _check_var_dict(self) -> None:
+        """Compiles the equation and finds the variables again, if :attr:`var_dict` was changed in place."""
+        if self._var_dict_key() != self._var_key:
+            self.set()
+
     @property
-    def value(self) -> [float, int, bool]:
+    def time_only(self) -> bool:
+        """
+        True, if the equation only uses `t`, `delta_t`, `episode_delta_t` and constants (no modules, no `value`)
+        and gives the same outputs, when it is evaluated for all steps at once (no `and`/`or`).
+        """
+        if self._vectorized or isinstance(self._dtype, ValueEnvModule):
+            return False
+        try:
+            names = equation_names(self._equation)
+            if equation_uses_bool_ops(self._equation):
+                return False
+        except SyntaxError:
+            return False
+        if 'value' in names:
+            return False
+        return not any(isinstance(self._var_dict.get(name), EnvModule) for name in names)
+
+    def precompute(self, t, delta_t, episode_delta_t) -> None:
+        """
+        Evaluates the equation for all steps `t` of an episode at once. Afterwards, :func:`step` and
+        :func:`take_step` look up the output for their step count `t`.
+        """
+        if not self.time_only:
+            self._table = None
+            return
+        try:
+            func = compile_equation(self._equation, self._var_dict, vectorize=True)
+            with np.errstate(all='raise'):
+                output = np.broadcast_to(func(t=t, delta_t=delta_t, episode_delta_t=episode_delta_t), t.shape)
+        except (SyntaxError, TypeError, ValueError, FloatingPointError):
+            # Not plain math, the equation uses delta_t or episode_delta_t, but the stepper has no delta_t,
+            # or a step would raise an error (e.g. division by zero).
+            # Falls back to evaluating the equation on each step.
+            self._table = None
+            return
+        self._table = [self._convert(x) for x in output.tolist()]
+
+    def clear_precomputed(self) -> None:
+        """Removes the outputs of :func:`WackyMath.precompute`, so each step evaluates the equation again."""
+        self._table = None
+
+    @property
+    def version(self) -> int:
+        """Increases, if the version of a variable changed (or on every call, if the output can not be cached)."""
+        self._check_var_dict()
+        if self._inputs is None:
+            self._version += 1
+            return self._version
+        return self._derived_version(self._inputs)
+
+    def _compute(self) -> [float, int, bool]:
+        if self._compiled:
+            return self._convert(self._func())
         return self._eval(copy.deepcopy(self._var_dict))
 
+    @property
+    def value(self) -> [float, int, bool]:
+        self._check_var_dict()
+        if self._inputs is None:
+            return self._compute()
+        return self._memo(self._compute)
+
     def set(self,  equation: str = None, var_dict: Dict = None):
         """Update :attr:`equation` or :attr:`var_dict`"""
         if equation is not None:
             self._equation = equation
         if var_dict is not None:
             self._var_dict = var_dict
+        if self._compiled:
+            self._func = compile_equation(self._equation, self._var_dict, vectorize=self._vectorized)
+        self._inputs = self._find_inputs()
+        self._var_key = self._var_dict_key()
+        self._inputs_key = None
+        self._version += 1
+
+    def _cloned(self) -> None:
+        if self._compiled:
+            self._func = rebind_equation(self._func, self._var_dict)
+        self._var_key = self._var_dict_key()
+
+    def __deepcopy__(self, memo):
+        # The compiled function holds the modules of var_dict, so it reads the copied modules instead:
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        for key, value in self.__dict__.items():
+            new.__dict__[key] = value if key == '_func' else copy.deepcopy(value, memo)
+        if self._compiled:
+            new._func = rebind_equation(self._func, new._var_dict)
+        new._var_key = new._var_dict_key()
+        return new
+
+    def __getstate__(self):
+        # Compiled functions can not be pickled, they are compiled again on unpickling:
+        state = self.__dict__.copy()
+        state['_func'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._compiled:
+            self._func = compile_equation(self._equation, self._var_dict, vectorize=self._vectorized)
+        self._var_key = self._var_dict_key()
 
     def step(self, t, delta_t, episode_delta_t) -> None:
         """
@@ -108,6 +315,12 @@ class WackyMath(ValueEnvModule):
         :return: Output of the equation
         :rtype: Any or :attr:`dtype`
         """
+        if self._table is not None and t < len(self._table):
+            return
+        if self._compiled:
+            self._convert(self._func(t=t, delta_t=delta_t, episode_delta_t=episode_delta_t))
+            return
+
         temp_dict = self._var_dict.copy()
         temp_dict['episode_delta_t'] = episode_delta_t
         temp_dict['delta_t'] = delta_t
@@ -133,6 +346,11 @@ class WackyMath(ValueEnvModule):
         :return: Output of the equation
         :rtype: Any or :attr:`dtype`
         """
+        if self._table is not None and t < len(self._table):
+            return self._table[t]
+        if self._compiled:
+            return self._convert(self._func(value=value, t=t, delta_t=delta_t, episode_delta_t=episode_delta_t))
+
         temp_dict = self._var_dict.copy()
         temp_dict['value'] = value
         temp_dict['delta_t'] = delta_t
@@ -162,3 +380,41 @@ class WackyMath(ValueEnvModule):
             'var_dict:': temp_dict,
             'dtype': dtype,
         }
+
+
+def main():
+    import timeit
+    from wacky_envs.numbers import FloatConstr
+
+    soc = FloatConstr(5.0, lowerbound=0.0, upperbound=10.0, name='soc')
+    price = FloatConstr(0.3, lowerbound=0.0, name='price')
+    var_dict = {'soc': soc, 'price': price, 'low': 2.0}
+    equation = '(soc - low) * price if soc > low else -abs(soc - low)'
+
+    math_eval = WackyMath(equation, var_dict, dtype=float)
+    math_compiled = WackyMath(equation, var_dict, dtype=float, compiled=True)
+    print(math_eval.value, math_compiled.value)
+
+    n = 10000
+    for label, math_test in [('eval', math_eval), ('compiled', math_compiled)]:
+        sec = timeit.timeit(lambda: math_test.take_step(soc.value, 1, 1.0, 1.0), number=n)
+        print(f'{label:>8}: {sec / n * 1e6:.2f} us per take_step')
+
+    from wacky_envs.arrays import BaseArray
+
+    socs = BaseArray(np.random.uniform(0.0, 10.0, size=(4096,)))
+    prices = BaseArray(np.random.uniform(0.0, 1.0, size=(4096,)))
+    math_vectorized = WackyMath(equation, {'soc': socs, 'price': prices, 'low': 2.0}, dtype=float, vectorized=True)
+    math_loop = WackyMath(equation, {'low': 2.0}, dtype=float, compiled=True)
+    print(np.allclose(math_vectorized.value, [math_loop(dict(soc=a, price=b)) for a, b in zip(socs, prices)]))
+
+    n = 100
+    for label, math_test in [
+        ('loop', lambda: [math_loop(dict(soc=a, price=b)) for a, b in zip(socs, prices)]),
+        ('vectorized', lambda: math_vectorized.value),
+    ]:
+        sec = timeit.timeit(math_test, number=n)
+        print(f'{label:>10}: {sec / n * 1e6:.2f} us for {len(socs)} values')
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,5 @@
 from wacky_envs.observations._base_observer import BaseObs
-from wacky_envs.observations.box_obs import BoxObs
\ No newline at end of file
+from wacky_envs.observations.box_obs import BoxObs
+from wacky_envs.observations.dict_obs import DictObs
+from wacky_envs.observations.norm_obs import NormObs
+from wacky_envs.observations.history_obs import RingHistory, HistoryObs
\ No newline at end of file
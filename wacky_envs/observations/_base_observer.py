@@ -9,6 +9,14 @@ class BaseObs(EnvModule):
     def __init__(self):
         super(BaseObs, self).__init__()
 
+    def reset(self) -> None:
+        """Called by :func:`wacky_envs.WackyEnv.reset` before the first observation of an episode."""
+        pass
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        """Called by :func:`wacky_envs.WackyEnv.step` once per step, before the observation is read."""
+        pass
+
     @abstractmethod
     def __call__(self):
         pass
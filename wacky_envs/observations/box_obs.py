@@ -5,26 +5,132 @@ from wacky_envs.observations import BaseObs
 
 
 class BoxObs(BaseObs):
-    """Observes the value of each module in :attr:`value_list`."""
+    """
+    Observes the value of each module in :attr:`value_list`.
 
-    def __init__(self, value_list: list):
+    The layout (offset and size of each value in the observation) is computed once, on the first call.
+    Then each call writes the values into a preallocated buffer. Modules, whose value changes its size,
+    trigger a new layout.
+    """
+
+    def __init__(self, value_list: list, dtype: type = np.float64, copy: bool = True):
+        """
+        :param value_list: Modules, whose values are observed (scalars or arrays, arrays are flattened).
+        :type value_list: list
+
+        :param dtype: Datatype of the observation and the space (optional), e.g. `np.float32`.
+        :type dtype: type
+
+        :param copy: Returns a new array on each call (optional). Otherwise the same buffer is returned
+            and overwritten by the next call.
+        :type copy: bool
+        """
         super(BoxObs, self).__init__()
-        self.value_list = value_list
+        self._value_list = value_list
+        self._dtype = np.dtype(dtype)
+        self._copy = copy
+        self._arena = None
+        self._arena_index = None
+        self._layout = None
+        self._all_scalars = False
+        self._buffer = None
+        self._space = None
+
+    @property
+    def value_list(self) -> list:
+        return self._value_list
+
+    @value_list.setter
+    def value_list(self, value_list: list) -> None:
+        self._value_list = value_list
+        self.rebuild_layout()
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Datatype of the observation."""
+        return self._dtype
+
+    def bind_arena(self, arena) -> None:
+        """
+        Reads the observation directly from a :class:`wacky_envs.numbers.NumberArena`, which holds the values
+        of all modules in :attr:`value_list`.
+
+        :param arena: Arena, to which all modules of :attr:`value_list` are attached
+        :type arena: :class:`wacky_envs.numbers.NumberArena`
+        """
+        self._arena_index = arena.index(self.value_list)
+        self._arena = arena
+
+    def rebuild_layout(self) -> None:
+        """Computes the offset and size of each value again (and the space) from the current values."""
+        layout, start = [], 0
+        for module in self._value_list:
+            value = module.value
+            size = int(np.size(value))
+            layout.append((module, start, start + size, np.ndim(value) == 0))
+            start += size
+        self._layout = layout
+        self._all_scalars = all(scalar for _, _, _, scalar in layout)
+        self._buffer = np.zeros(start, dtype=self._dtype)
+        self._space = None
+
+    def _fill(self) -> None:
+        buffer = self._buffer
+        if self._all_scalars:
+            buffer[:] = [module.value for module in self._value_list]
+            return
+        for module, start, stop, scalar in self._layout:
+            if scalar:
+                buffer[start] = module.value
+            else:
+                buffer[start:stop] = np.ravel(module.value)
 
     def __call__(self):
-        obs = np.array([])
-        for v in self.value_list:
-            obs = np.append(obs, v.value)
-        return obs
+        if self._arena is not None:
+            obs = self._arena.values[self._arena_index]
+            if obs.dtype != self._dtype:
+                return obs.astype(self._dtype)
+            return obs.copy() if self._copy and isinstance(self._arena_index, slice) else obs
+
+        if self._layout is None:
+            self.rebuild_layout()
+        try:
+            self._fill()
+        except ValueError:
+            # The size of a value changed:
+            self.rebuild_layout()
+            self._fill()
+        return self._buffer.copy() if self._copy else self._buffer
 
     @property
     def n_values(self):
-        return len(self.__call__())
+        if self._layout is None:
+            self.rebuild_layout()
+        return len(self._buffer)
 
     @property
     def space(self):
-        return spaces.Box(
-            low=-np.inf,
-            high=np.inf,
-            shape=(self.n_values,)
-        )
+        if self._space is None:
+            self._space = spaces.Box(
+                low=-np.inf,
+                high=np.inf,
+                shape=(self.n_values,),
+                dtype=self._dtype,
+            )
+        return self._space
+
+
+def main():
+    import timeit
+    from wacky_envs.numbers import WackyFloat
+
+    test = BoxObs([WackyFloat(float(i)) for i in range(500)])
+    print(test.space, test()[:5])
+
+    n = 1000
+    sec = timeit.timeit(test, number=n)
+    print(f'{sec / n * 1e6:.2f} us per observation of {test.n_values} values')
+
+
+if __name__ == '__main__':
+    main()
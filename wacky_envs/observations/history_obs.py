@@ -0,0 +1,164 @@
+from gym import spaces
+import numpy as np
+
+from wacky_envs.observations import BaseObs
+
+
+class RingHistory:
+    """
+    The last :attr:`k` values in a circular buffer.
+
+    Each value is written twice, into a buffer of length `2 * k`, so the last `k` values in order are always
+    a contiguous slice of the buffer (see :attr:`history`). Adding a value writes two rows and copies nothing else.
+
+    With `batch_size`, the buffer holds a history for each element of a batch (e.g. of vectorized environments)
+    and :attr:`history` has the shape `(batch_size, k) + shape`.
+    """
+
+    def __init__(self, k: int, shape: tuple, batch_size: int = None, dtype: type = np.float64, **kwargs):
+        """
+        :param k: Length of the history
+        :type k: int
+
+        :param shape: Shape of a value (for batches: without the batch dimension)
+        :type shape: tuple
+
+        :param batch_size: Number of histories (optional).
+        :type batch_size: int
+
+        :param dtype: Datatype of the values (optional).
+        :type dtype: type
+        """
+        super(RingHistory, self).__init__(**kwargs)
+        if k < 1:
+            raise ValueError(f'Expected a history length of at least 1, got {k} instead.')
+        self._k = k
+        self._batched = batch_size is not None
+        shape = (2 * k,) + tuple(shape)
+        self._buffer = np.zeros((batch_size,) + shape if self._batched else shape, dtype=dtype)
+        self._pos = 0
+
+    @property
+    def k(self) -> int:
+        """Length of the history."""
+        return self._k
+
+    @property
+    def history(self) -> np.ndarray:
+        """The last :attr:`k` values, oldest first (a view of the buffer)."""
+        if self._batched:
+            return self._buffer[:, self._pos:self._pos + self._k]
+        return self._buffer[self._pos:self._pos + self._k]
+
+    def push(self, value) -> None:
+        """Replaces the oldest value with `value`."""
+        pos, k = self._pos, self._k
+        if self._batched:
+            self._buffer[:, pos] = value
+            self._buffer[:, pos + k] = value
+        else:
+            self._buffer[pos] = value
+            self._buffer[pos + k] = value
+        self._pos = pos + 1 if pos + 1 < k else 0
+
+    def fill(self, value, mask: np.ndarray = None) -> None:
+        """
+        Sets all values of the history to `value`.
+
+        :param value: New value (for batches: of all elements)
+        :param mask: Only fills the histories of the batch elements selected by this boolean array (optional).
+        """
+        if not self._batched:
+            self._buffer[...] = value
+        elif mask is None:
+            self._buffer[...] = np.expand_dims(value, 1)
+        else:
+            self._buffer[mask] = np.expand_dims(np.asarray(value)[mask], 1)
+
+
+class HistoryObs(RingHistory, BaseObs):
+    """
+    Observes the last :attr:`k` observations of another observation module (frame stacking),
+    e.g. of a :class:`wacky_envs.observations.BoxObs`.
+
+    Each step adds the observation of the wrapped module to a :class:`RingHistory` (see :func:`HistoryObs.step`)
+    and on :func:`wacky_envs.WackyEnv.reset` the history is filled with the first observation.
+    Calling the module returns the history as a view, oldest first, without adding an observation.
+    """
+
+    state_attrs = ('_buffer', '_pos')
+
+    def __init__(self, obs: BaseObs, k: int, flatten: bool = False, copy: bool = False):
+        """
+        :param obs: Observation module with a `Box` space
+        :type obs: :class:`wacky_envs.observations.BaseObs`
+
+        :param k: Length of the history
+        :type k: int
+
+        :param flatten: Returns the history with shape `(k * n_values,)` instead of `(k, n_values)` (optional).
+        :type flatten: bool
+
+        :param copy: Returns a new array on each call (optional). Otherwise the returned view
+            changes with the next call.
+        :type copy: bool
+        """
+        inner_space = obs.space
+        if not isinstance(inner_space, spaces.Box):
+            raise TypeError(f'Expected an observation with space Box. Got {type(inner_space)} instead.')
+        super(HistoryObs, self).__init__(k, inner_space.shape, dtype=inner_space.dtype)
+        self._obs = obs
+        self.flatten = flatten
+        self._copy = copy
+        shape = (k * int(np.prod(inner_space.shape)),) if flatten else (k,) + inner_space.shape
+        self._space = spaces.Box(
+            low=np.broadcast_to(inner_space.low, (k,) + inner_space.shape).reshape(shape),
+            high=np.broadcast_to(inner_space.high, (k,) + inner_space.shape).reshape(shape),
+            dtype=inner_space.dtype,
+        )
+
+    @property
+    def obs(self) -> BaseObs:
+        """Wrapped observation module."""
+        return self._obs
+
+    def reset(self) -> None:
+        self._obs.reset()
+        self.fill(self._obs())
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        self._obs.step(t, delta_t, episode_delta_t)
+        self.push(self._obs())
+
+    def __call__(self) -> np.ndarray:
+        history = self.history
+        if self.flatten:
+            history = history.reshape(-1)
+        return history.copy() if self._copy else history
+
+    @property
+    def space(self) -> spaces.Box:
+        return self._space
+
+
+def main():
+    import timeit
+    from wacky_envs.numbers import WackyFloat
+    from wacky_envs.observations import BoxObs
+
+    values = [WackyFloat(0.0) for _ in range(100)]
+    test = HistoryObs(BoxObs(values, copy=False), k=4)
+    test.reset()
+    for i in range(6):
+        values[0].set(float(i))
+        test.step(i, 1.0, float(i))
+    obs = test()
+    print(test.space, obs[:, 0], obs.flags['C_CONTIGUOUS'])
+
+    n = 10000
+    sec = timeit.timeit(lambda: test.step(0, 1.0, 0.0), number=n)
+    print(f'{sec / n * 1e6:.2f} us per step')
+
+
+if __name__ == '__main__':
+    main()
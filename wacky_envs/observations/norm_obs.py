@@ -0,0 +1,91 @@
+from gym import spaces
+import numpy as np
+
+from wacky_envs.normalization import RunningMeanStd, _Normalizer
+from wacky_envs.observations import BaseObs
+
+
+class NormObs(_Normalizer, BaseObs):
+    """
+    Normalizes the observation of another observation module (e.g. :class:`wacky_envs.observations.BoxObs`)
+    with a running mean and standard deviation (see :class:`wacky_envs.normalization.RunningMeanStd`)
+    and clips it. The statistics are updated in place once per step and on reset, unless the module is frozen.
+    Calling the module only normalizes the current observation, the result is written into a preallocated buffer.
+    """
+
+    state_attrs = ('_stats_count', '_stats_mean', '_stats_m2')
+
+    def __init__(self, obs: BaseObs, clip: float = 10.0, epsilon: float = 1e-8, copy: bool = True):
+        """
+        :param obs: Observation module with a `Box` space
+        :type obs: :class:`wacky_envs.observations.BaseObs`
+
+        :param clip: Clips the normalized values to [-clip, clip] (optional).
+        :type clip: float
+
+        :param epsilon: Added to the variance (optional).
+        :type epsilon: float
+
+        :param copy: Returns a new array on each call (optional). Otherwise the same buffer is returned
+            and overwritten by the next call.
+        :type copy: bool
+        """
+        super(NormObs, self).__init__()
+        inner_space = obs.space
+        if not isinstance(inner_space, spaces.Box):
+            raise TypeError(f'Expected an observation with space Box. Got {type(inner_space)} instead.')
+        self._obs = obs
+        self.clip = clip
+        self.epsilon = epsilon
+        self._copy = copy
+        self._dtype = inner_space.dtype
+        self._stats = RunningMeanStd(inner_space.shape)
+        self._frozen = False
+        self._std = np.ones(inner_space.shape)
+        self._buffer = np.zeros(inner_space.shape, dtype=self._dtype)
+        self._space = spaces.Box(
+            low=-np.inf if clip is None else -clip,
+            high=np.inf if clip is None else clip,
+            shape=inner_space.shape,
+            dtype=self._dtype,
+        )
+
+    @property
+    def obs(self) -> BaseObs:
+        """Wrapped observation module."""
+        return self._obs
+
+    def reset(self) -> None:
+        self._obs.reset()
+        self._update()
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        self._obs.step(t, delta_t, episode_delta_t)
+        self._update()
+
+    def _update(self) -> None:
+        """Adds the current observation of :attr:`obs` to the statistics, unless frozen."""
+        if not self._frozen:
+            self._stats.update(self._obs())
+
+    def __call__(self) -> np.ndarray:
+        raw = self._obs()
+        stats = self._stats
+        std = self._std
+        if stats.count > 1:
+            np.divide(stats.m2, stats.count, out=std)
+        else:
+            std.fill(1.0)
+        std += self.epsilon
+        np.sqrt(std, out=std)
+
+        buffer = self._buffer
+        np.subtract(raw, stats.mean, out=buffer, casting='unsafe')
+        np.divide(buffer, std, out=buffer, casting='unsafe')
+        if self.clip is not None:
+            np.clip(buffer, -self.clip, self.clip, out=buffer)
+        return buffer.copy() if self._copy else buffer
+
+    @property
+    def space(self) -> spaces.Box:
+        return self._space
@@ -0,0 +1,122 @@
+import json
+from typing import Dict, Tuple
+
+from wacky_envs.env_module import EnvModule
+
+
+class StepProfiler:
+    """
+    Records wall time and call counts of environment modules, grouped by the phase of :func:`wacky_envs.WackyEnv.step`
+    (or :func:`wacky_envs.WackyEnv.reset`) and the module id. See :func:`wacky_envs.WackyEnv.enable_profiling`.
+
+    Phases:
+
+    - 'action': :func:`BaseAction.__call__`
+    - 'call_modules': :func:`EnvModule.__call__` for :attr:`WackyEnv.call_modules`
+    - 'step_modules': :func:`EnvModule.step` for :attr:`WackyEnv.step_modules`
+    - 'stepper': :func:`BaseStepper.next` and :func:`BaseStepper.reset`
+    - 'terminator_step': :func:`EnvModule.step` of the terminator
+    - 'terminator': :func:`EnvModule.__call__` of the terminator
+    - 'observation_step': :func:`BaseObs.step`
+    - 'observation': :func:`BaseObs.__call__`
+    - 'reward_step': :func:`NormReward.step`, if the reward is normalized
+    - 'reward': :func:`EnvModule.__call__` of the reward
+    - 'reset_modules': :func:`EnvModule.reset` for :attr:`WackyEnv.reset_modules`
+    """
+
+    PHASES = (
+        'action', 'call_modules', 'step_modules', 'stepper', 'terminator_step', 'observation_step', 'observation',
+        'reward_step', 'reward', 'terminator', 'reset_modules',
+    )
+
+    def __init__(self):
+        self._counters: Dict[Tuple[str, int], list] = {}
+        self._labels: Dict[int, str] = {}
+
+    def counter(self, phase: str, module: EnvModule) -> list:
+        """
+        Returns the counter `[calls, seconds]` for `module` in `phase`. Creates it on the first request.
+
+        :param phase: One of :attr:`StepProfiler.PHASES`
+        :param module: Environment module (or any other callable, e.g. in :attr:`WackyEnv.call_modules`)
+
+        :return: Mutable counter `[calls, seconds]`
+        :rtype: list
+        """
+        module_id = getattr(module, 'id', id(module))
+        key = (phase, module_id)
+        if key not in self._counters:
+            self._counters[key] = [0, 0.0]
+            if isinstance(module, EnvModule):
+                self._labels[module_id] = f"{module.classname}(name={module.name}, id={module_id})"
+            else:
+                self._labels[module_id] = repr(module)
+        return self._counters[key]
+
+    def reset(self) -> None:
+        """Clears all counters."""
+        self._counters.clear()
+        self._labels.clear()
+
+    @property
+    def records(self) -> list:
+        """One dict per phase and module, sorted by total time (descending)."""
+        records = [
+            {
+                'phase': phase,
+                'id': module_id,
+                'module': self._labels[module_id],
+                'calls': calls,
+                'total_s': seconds,
+                'mean_us': seconds / calls * 1e6 if calls else 0.0,
+            }
+            for (phase, module_id), (calls, seconds) in self._counters.items()
+        ]
+        return sorted(records, key=lambda r: r['total_s'], reverse=True)
+
+    @property
+    def phase_totals(self) -> dict:
+        """Total time in seconds for each phase."""
+        totals = {}
+        for (phase, _), (_, seconds) in self._counters.items():
+            totals[phase] = totals.get(phase, 0.0) + seconds
+        return totals
+
+    def to_json(self, path: str = None) -> str:
+        """
+        Exports the records as JSON.
+
+        :param path: Also writes the JSON to this file (optional).
+        :type path: str
+
+        :return: JSON string
+        :rtype: str
+        """
+        data = json.dumps({'phase_totals': self.phase_totals, 'records': self.records}, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(data)
+        return data
+
+    def table(self, top: int = None) -> str:
+        """
+        Formats the records as a text table.
+
+        :param top: Only the `top` records with the highest total time (optional).
+        :type top: int
+
+        :return: Table
+        :rtype: str
+        """
+        records = self.records if top is None else self.records[:top]
+        width = max([len(r['module']) for r in records] + [len('module')])
+        lines = [f"{'phase':<14} {'module':<{width}} {'calls':>8} {'total ms':>10} {'mean us':>10}"]
+        for r in records:
+            lines.append(
+                f"{r['phase']:<14} {r['module']:<{width}} {r['calls']:>8} "
+                f"{r['total_s'] * 1e3:>10.3f} {r['mean_us']:>10.2f}"
+            )
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(n_records={len(self._counters)})"
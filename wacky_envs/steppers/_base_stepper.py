@@ -13,6 +13,7 @@ class BaseStepper(ValueEnvModule):
     t: int
     delta_t: float
     max_t: int
+    state_attrs = ('_value', '_prev_value', '_t', '_total_t')
 
     @property
     def dtype(self) -> type:
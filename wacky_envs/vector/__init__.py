@@ -0,0 +1,2 @@
+from wacky_envs.vector.vec_env import VecWackyEnv
+from wacky_envs.vector.subproc_env import SubprocWackyEnv
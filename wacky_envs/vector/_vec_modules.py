@@ -0,0 +1,342 @@
+import numpy as np
+
+from wacky_envs.env_module import EnvModule
+from wacky_envs.numbers._equation_compiler import compile_equation
+
+
+class VecValue:
+    """
+    Holds the value of one :class:`wacky_envs.ValueEnvModule` for `n_envs` environment copies.
+
+    The arrays :attr:`value` and :attr:`prev_value` have the shape `(n_envs,)` and are updated in place.
+    """
+
+    def __init__(self, module, n_envs: int, dtype=np.float64):
+        self.module = module
+        self.n_envs = n_envs
+        self.init_value = module.init_value
+        self.value = np.full(n_envs, self.init_value, dtype=dtype)
+        self.prev_value = self.value.copy()
+
+    def set(self, value, mask: np.ndarray = None) -> None:
+        """
+        Updates `value` and `prev_value` of all copies or only of the copies selected by `mask`.
+
+        :param value: New values, scalar or shape `(n_envs,)`
+        :param mask: Boolean array of shape `(n_envs,)` (optional)
+        """
+        if mask is None:
+            self.prev_value[:] = self.value
+            np.copyto(self.value, value, casting='unsafe')
+        else:
+            np.copyto(self.prev_value, self.value, where=mask)
+            np.copyto(self.value, np.broadcast_to(value, self.value.shape), casting='unsafe', where=mask)
+
+    def reset(self, mask: np.ndarray) -> None:
+        """Assigns `init_value` to value and `prev_value` of the copies selected by `mask`."""
+        self.value[mask] = self.init_value
+        self.prev_value[mask] = self.init_value
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        pass
+
+    @property
+    def delta_value(self) -> np.ndarray:
+        return self.value - self.prev_value
+
+    def __call__(self, *args, **kwargs) -> np.ndarray:
+        return self.value
+
+
+class VecNumber(VecValue):
+    """Vectorized :class:`wacky_envs.numbers.WackyFloat` and :class:`wacky_envs.numbers.WackyInt`."""
+
+    def __init__(self, module, n_envs: int):
+        self.is_int = module.dtype is int
+        super(VecNumber, self).__init__(module, n_envs, np.int64 if self.is_int else np.float64)
+
+    def set(self, value, mask: np.ndarray = None) -> None:
+        if self.is_int:
+            value = np.trunc(value)
+        super(VecNumber, self).set(value, mask)
+
+    def act(self, input) -> None:
+        self.set(input)
+
+
+class VecConstr(VecNumber):
+    """
+    Vectorized :class:`wacky_envs.numbers.FloatConstr` and :class:`wacky_envs.numbers.IntConstr`.
+
+    Applies the same bounds, operation times, action lock and error flags as the scalar modules
+    to all copies at once.
+    """
+
+    def __init__(self, module, n_envs: int, lookup):
+        super(VecConstr, self).__init__(module, n_envs)
+        self.upperbound = lookup(module.upperbound)
+        self.lowerbound = lookup(module.lowerbound)
+        self.rate_add = lookup(module.rate_add)
+        self.rate_sub = lookup(module.rate_sub)
+        self.func_time = lookup(module.func_time)
+        self.action_lock = module.action_lock
+
+        self.errors = np.zeros((n_envs, 2))
+        self.op_x = np.zeros(n_envs, dtype=self.value.dtype)
+        self.op_time = np.zeros(n_envs)
+        self.delta_op_x = np.zeros(n_envs, dtype=self.value.dtype)
+        self.to_accept_op_x = np.zeros(n_envs, dtype=self.value.dtype)
+        self.to_accept_op_time = np.zeros(n_envs)
+        self.prev_step_values = np.full((n_envs, 2), self.init_value, dtype=self.value.dtype)
+
+    def reset(self, mask: np.ndarray) -> None:
+        super(VecConstr, self).reset(mask)
+        self.prev_step_values[mask] = self.init_value
+        self.errors[mask] = 0.0
+        self.op_x[mask] = 0
+        self.op_time[mask] = 0.0
+        self.delta_op_x[mask] = 0
+
+    @property
+    def is_operating(self) -> np.ndarray:
+        return self.op_x != 0
+
+    @property
+    def is_waiting(self) -> np.ndarray:
+        return (self.op_x == 0) & (self.op_time != 0.0)
+
+    @property
+    def error_signal(self) -> np.ndarray:
+        return np.any(self.errors, axis=1)
+
+    @property
+    def delta_step(self) -> np.ndarray:
+        return self.prev_step_values[:, -1] - self.prev_step_values[:, -2]
+
+    @property
+    def delta_op(self) -> np.ndarray:
+        return self.delta_op_x
+
+    def delta(self, x: np.ndarray) -> None:
+        """Vectorized :func:`wacky_envs.numbers.FloatConstr.delta`."""
+        x = np.array(x, dtype=np.float64)
+
+        if self.upperbound is not None:
+            upper = self.upperbound.value
+            exceeds = (x > 0.0) & ((self.value + x) > upper)
+            self.errors[exceeds, 0] = 1
+            x = np.where(exceeds, upper - self.value, x)
+
+        if self.lowerbound is not None:
+            lower = self.lowerbound.value
+            exceeds = (x < 0.0) & ((self.value - x) < lower)
+            self.errors[exceeds, 0] = 1
+            x = np.where(exceeds, lower - self.value, x)
+
+        if self.action_lock:
+            locked = self.is_operating | self.is_waiting
+            self.errors[locked, 1] = 1
+        else:
+            locked = np.zeros(self.n_envs, dtype=bool)
+
+        op_time = np.zeros(self.n_envs)
+        if self.rate_add is not None:
+            op_time = np.where(x > 0, self.rate_add.value * x, op_time)
+        if self.rate_sub is not None:
+            op_time = np.where(x < 0, self.rate_sub.value * np.abs(x), op_time)
+
+        free = ~locked
+        np.copyto(self.to_accept_op_time, op_time, where=free)
+        np.copyto(self.to_accept_op_x, x, casting='unsafe', where=free)
+
+    def accept(self, x: np.ndarray, delta_t: np.ndarray, mask: np.ndarray = None) -> None:
+        """Vectorized :func:`wacky_envs.numbers.FloatConstr.accept`."""
+        if mask is None:
+            mask = np.ones(self.n_envs, dtype=bool)
+        x = np.broadcast_to(x, self.value.shape)
+        instant = mask & (delta_t == 0.0)
+        pending = mask & ~instant
+
+        np.copyto(self.op_time, delta_t, where=mask)
+        self.set(self.value + x, instant)
+        np.copyto(self.delta_op_x, x, casting='unsafe', where=instant)
+        self.op_x[instant] = 0
+        np.copyto(self.op_x, x, casting='unsafe', where=pending)
+        self.delta_op_x[pending] = 0
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        """Vectorized :func:`wacky_envs.numbers.FloatConstr.step`."""
+        operating = self.is_operating
+        completed = operating & (self.op_time <= delta_t)
+        running = operating & ~completed
+
+        if np.any(completed):
+            np.copyto(self.delta_op_x, self.op_x, where=completed)
+            self.set(self.op_x + self.value, completed)
+            self.op_x[completed] = 0
+            self.op_time[completed] = 0.0
+        self.op_time[running] -= delta_t if np.isscalar(delta_t) else delta_t[running]
+
+        if self.func_time is not None:
+            new_value = self.func_time.take_step(self.value, t, delta_t, episode_delta_t)
+            self.set(np.floor(new_value) if self.is_int else new_value)
+
+        x_low = self.value if self.lowerbound is None else np.maximum(self.value, self.lowerbound.value)
+        x_up = self.value if self.upperbound is None else np.minimum(self.value, self.upperbound.value)
+        self.set(np.maximum(x_low, x_up))
+        self.errors[:] = 0.0
+
+        self.prev_step_values[:, 0] = self.prev_step_values[:, 1]
+        self.prev_step_values[:, 1] = self.value
+
+
+class VecMath:
+    """Vectorized :class:`wacky_envs.numbers.WackyMath`. Evaluates the equation on arrays of shape `(n_envs,)`."""
+
+    def __init__(self, module, n_envs: int, lookup):
+        self.module = module
+        self.n_envs = n_envs
+        var_dict = {k: lookup(v) if isinstance(v, EnvModule) else v for k, v in module.var_dict.items()}
+        self._func = compile_equation(module.equation, var_dict, vectorize=True, module_types=VEC_MODULE_TYPES)
+        self._dtype = lookup(module.dtype) if isinstance(module.dtype, EnvModule) else module.dtype
+
+    def _convert(self, output) -> np.ndarray:
+        output = np.asarray(output)
+        if output.shape != (self.n_envs,):
+            output = np.broadcast_to(output, (self.n_envs,)).copy()
+        if self._dtype is None:
+            return output
+        elif self._dtype is int:
+            return np.trunc(output).astype(np.int64)
+        elif self._dtype is float:
+            return output.astype(np.float64)
+        else:
+            self._dtype.set(output)
+            return self._dtype.value
+
+    @property
+    def value(self) -> np.ndarray:
+        return self._convert(self._func())
+
+    def __call__(self, additional_vars: dict = None) -> np.ndarray:
+        if additional_vars is None:
+            return self.value
+        return self._convert(self._func(**additional_vars))
+
+    def reset(self, mask: np.ndarray) -> None:
+        pass
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        self._convert(self._func(t=t, delta_t=delta_t, episode_delta_t=episode_delta_t))
+
+    def take_step(self, value, t, delta_t, episode_delta_t) -> np.ndarray:
+        return self._convert(self._func(value=value, t=t, delta_t=delta_t, episode_delta_t=episode_delta_t))
+
+
+class VecStepper:
+    """Vectorized :class:`wacky_envs.steppers.FixStepper` with a step counter per copy."""
+
+    def __init__(self, module, n_envs: int):
+        self.module = module
+        self.n_envs = n_envs
+        self.delta_t = 0.0 if module.delta_t is None else module.delta_t
+        self.max_t = module.max_t
+        self.init_value = 0.0 if module.init_value is None else module.init_value
+        self.t = np.zeros(n_envs, dtype=np.int64)
+        self.value = np.full(n_envs, self.init_value)
+        self.prev_value = self.value.copy()
+
+    @property
+    def episode_delta_t(self) -> np.ndarray:
+        return self.value
+
+    def next(self) -> None:
+        self.t += 1
+        self.prev_value[:] = self.value
+        self.value += self.delta_t
+
+    def reset(self, mask: np.ndarray) -> None:
+        self.t[mask] = 0
+        self.value[mask] = self.init_value
+        self.prev_value[mask] = self.init_value
+
+    @property
+    def done(self) -> np.ndarray:
+        if self.max_t is None:
+            return np.zeros(self.n_envs, dtype=bool)
+        return self.t >= self.max_t
+
+
+class VecTransfer:
+    """Vectorized :class:`wacky_envs.callables.ValueTransfer`."""
+
+    def __init__(self, module, n_envs: int, lookup):
+        self.module = module
+        self.delta_x = lookup(module.delta_x)
+        self.trans_from = lookup(module.trans_from)
+        self.trans_to = lookup(module.trans_to)
+        self.trans_from_func = lookup(module.trans_from_func)
+        self.trans_to_func = lookup(module.trans_to_func)
+        self.error_signal = np.zeros(n_envs, dtype=bool)
+
+    def __call__(self) -> None:
+        x_from = self.delta_x.value
+
+        if self.trans_to_func is not None:
+            x_to = np.abs(self.trans_to_func({'x': x_from}))
+        else:
+            x_to = x_from
+
+        self.trans_from.delta(-x_from)
+        self.trans_to.delta(x_to)
+
+        self.error_signal = self.trans_from.error_signal | self.trans_to.error_signal
+        valid = ~self.error_signal
+
+        if np.any(valid):
+            delta_t = np.maximum(self.trans_from.to_accept_op_time, self.trans_to.to_accept_op_time)
+
+            x_from = np.abs(self.trans_from.to_accept_op_x)
+            x_to = np.abs(self.trans_to.to_accept_op_x)
+
+            if self.trans_from_func is not None:
+                x_to = np.abs(self.trans_from_func({'y': x_to}))
+
+            x_from = np.minimum(x_from, x_to)
+
+            if self.trans_to_func is not None:
+                x_to = np.abs(self.trans_to_func({'x': x_from}))
+            else:
+                x_to = x_from
+
+            self.trans_from.accept(-x_from, delta_t, valid)
+            self.trans_to.accept(x_to, delta_t, valid)
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        self.__call__()
+
+    def reset(self, mask: np.ndarray) -> None:
+        pass
+
+
+class VecUpdate:
+    """Vectorized :class:`wacky_envs.callables.ValueUpdate`."""
+
+    def __init__(self, module, n_envs: int, lookup):
+        self.module = module
+        self.to_update = lookup(module.to_update)
+        self.set_from = lookup(module.set_from)
+
+    def __call__(self) -> None:
+        self.to_update.delta(self.set_from.value - self.to_update.value)
+        self.to_update.accept(self.to_update.to_accept_op_x, self.to_update.to_accept_op_time)
+
+    def step(self, t, delta_t, episode_delta_t) -> None:
+        self.__call__()
+
+    def reset(self, mask: np.ndarray) -> None:
+        pass
+
+
+VEC_MODULE_TYPES = (VecValue, VecMath, VecStepper)
+"""Vectorized modules, that are read with `.value` in vectorized equations."""
@@ -0,0 +1,237 @@
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+from typing import Callable, List
+
+import numpy as np
+from gym import spaces
+
+
+def _action_layout(space: spaces.Space) -> tuple:
+    """Shape and dtype of a single action in the shared action buffer."""
+    if isinstance(space, spaces.Discrete):
+        return (), np.int64
+    elif isinstance(space, spaces.MultiDiscrete):
+        return tuple(np.shape(space.nvec)), np.int64
+    elif isinstance(space, spaces.Box):
+        return tuple(space.shape), np.float64
+    else:
+        raise TypeError(f'Unsupported action space: {space}.')
+
+
+class _SharedArray:
+    """Numpy array in a :class:`multiprocessing.shared_memory.SharedMemory` block."""
+
+    def __init__(self, shape: tuple, dtype, name: str = None):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * self.dtype.itemsize, 1)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.array = np.ndarray(shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def spec(self) -> tuple:
+        """Everything a worker process needs to attach to the array."""
+        return self.shape, self.dtype.str, self.shm.name
+
+    def close(self, unlink: bool = False) -> None:
+        self.array = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker(remote, parent_remote, env_fns, start, specs) -> None:
+    """Steps the environments of one worker. Only short commands are sent through the pipe."""
+    parent_remote.close()
+    buffers = {key: _SharedArray(shape, dtype, name) for key, (shape, dtype, name) in specs.items()}
+    obs, terminal_obs = buffers['obs'].array, buffers['terminal_obs'].array
+    rewards, dones, actions = buffers['rewards'].array, buffers['dones'].array, buffers['actions'].array
+
+    try:
+        envs = [env_fn() for env_fn in env_fns]
+        remote.send(('ready', None))
+
+        while True:
+            cmd = remote.recv()
+            if cmd == 'step':
+                for i, env in enumerate(envs, start):
+                    ob, reward, done, _ = env.step(actions[i])
+                    if done:
+                        terminal_obs[i] = ob
+                        ob = env.reset()
+                    obs[i] = ob
+                    rewards[i] = reward
+                    dones[i] = done
+                remote.send(('ok', None))
+            elif cmd == 'reset':
+                for i, env in enumerate(envs, start):
+                    obs[i] = env.reset()
+                remote.send(('ok', None))
+            elif cmd == 'close':
+                break
+            else:
+                raise ValueError(f'Unknown command: {cmd}')
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        remote.send(('error', traceback.format_exc()))
+    finally:
+        for buffer in buffers.values():
+            buffer.close()
+        remote.close()
+
+
+class SubprocWackyEnv:
+    """
+    Runs environments (e.g. :class:`wacky_envs.WackyEnv`) in `n_workers` subprocesses. Each worker holds
+    one or more environments.
+
+    Observations, rewards and dones are written by the workers straight into shared memory and actions
+    are read from shared memory, so nothing is pickled per step. Only a short command is sent to each worker.
+
+    :func:`SubprocWackyEnv.step_async` returns immediately, which allows to overlap the simulation in the workers
+    with other work (e.g. policy inference for the previous batch). :func:`SubprocWackyEnv.step_wait`
+    blocks until all workers are done. Environments that are done get reset in the worker, their last
+    observation is returned in `info['terminal_observation']`.
+
+    Note:
+        Environments are created in the workers, so `env_fns` must be picklable
+        for the start methods `'spawn'` and `'forkserver'`.
+    """
+
+    def __init__(self, env_fns: List[Callable], n_workers: int = None, start_method: str = None):
+        """
+        Starts the workers.
+
+        :param env_fns: Functions that create one environment each.
+        :type env_fns: List[Callable]
+
+        :param n_workers: Number of worker processes (optional). Defaults to one worker per environment.
+        :type n_workers: int
+
+        :param start_method: Multiprocessing start method, e.g. `'fork'`, `'spawn'` or `'forkserver'` (optional).
+        :type start_method: str
+        """
+        self.n_envs = len(env_fns)
+        self.n_workers = min(n_workers or self.n_envs, self.n_envs)
+
+        # The spaces are read from a local environment, which is not stepped:
+        env = env_fns[0]()
+        self.observation_space = env.observation_space
+        self.action_space = env.action_space
+        action_shape, action_dtype = _action_layout(self.action_space)
+
+        n = self.n_envs
+        self._buffers = {
+            'obs': _SharedArray((n,) + tuple(self.observation_space.shape), np.float64),
+            'terminal_obs': _SharedArray((n,) + tuple(self.observation_space.shape), np.float64),
+            'rewards': _SharedArray((n,), np.float64),
+            'dones': _SharedArray((n,), bool),
+            'actions': _SharedArray((n,) + action_shape, action_dtype),
+        }
+        specs = {key: buffer.spec for key, buffer in self._buffers.items()}
+
+        ctx = mp.get_context(start_method)
+        self.remotes, self.processes = [], []
+        for worker_envs in np.array_split(np.arange(n), self.n_workers):
+            remote, work_remote = ctx.Pipe()
+            fns = [env_fns[i] for i in worker_envs]
+            process = ctx.Process(
+                target=_worker,
+                args=(work_remote, remote, fns, int(worker_envs[0]), specs),
+                daemon=True,
+            )
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        self.waiting = False
+        self.closed = False
+        self._receive()
+
+    @property
+    def num_envs(self) -> int:
+        """Number of environments over all workers."""
+        return self.n_envs
+
+    def _receive(self) -> None:
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        for status, msg in results:
+            if status == 'error':
+                self.close()
+                raise RuntimeError(f'Error in worker process:\n{msg}')
+
+    def reset(self) -> np.ndarray:
+        """
+        Resets all environments.
+
+        :return: Current observations, shape `(n_envs, n_values)`
+        :rtype: np.ndarray
+        """
+        for remote in self.remotes:
+            remote.send('reset')
+        self._receive()
+        return self._buffers['obs'].array.copy()
+
+    def step_async(self, actions) -> None:
+        """
+        Writes the actions into shared memory and tells all workers to step. Returns immediately.
+
+        :param actions: Actions for all environments
+        """
+        self._buffers['actions'].array[:] = actions
+        for remote in self.remotes:
+            remote.send('step')
+        self.waiting = True
+
+    def step_wait(self) -> tuple:
+        """
+        Waits for all workers to finish the step started with :func:`SubprocWackyEnv.step_async`.
+
+        :return: Tuple of observations, rewards, dones and info
+        :rtype: tuple
+        """
+        self._receive()
+        dones = self._buffers['dones'].array.copy()
+        info = {}
+        if np.any(dones):
+            info['terminal_observation'] = np.where(
+                dones.reshape((-1,) + (1,) * (self._buffers['obs'].array.ndim - 1)),
+                self._buffers['terminal_obs'].array,
+                self._buffers['obs'].array,
+            )
+        return self._buffers['obs'].array.copy(), self._buffers['rewards'].array.copy(), dones, info
+
+    def step(self, actions) -> tuple:
+        """
+        Steps all environments. Same as :func:`SubprocWackyEnv.step_async` followed by
+        :func:`SubprocWackyEnv.step_wait`.
+
+        :param actions: Actions for all environments
+
+        :return: Tuple of observations, rewards, dones and info
+        :rtype: tuple
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        """Stops the workers and frees the shared memory."""
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            try:
+                remote.send('close')
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self.processes:
+            process.join()
+        for buffer in self._buffers.values():
+            buffer.close(unlink=True)
+        self.closed = True
@@ -0,0 +1,236 @@
+import numpy as np
+from gym import spaces
+
+from wacky_envs import EnvModule
+from wacky_envs.env import WackyEnv
+from wacky_envs.numbers import WackyFloat, WackyInt, WackyMath, FloatConstr, IntConstr
+from wacky_envs.steppers import FixStepper
+from wacky_envs.callables import ValueTransfer, ValueUpdate
+from wacky_envs.actions import DiscreteAction, AtomizedAction, DiscreteSinglesToMulti, BoxAction
+from wacky_envs.observations import BoxObs, HistoryObs, RingHistory
+from wacky_envs.vector._vec_modules import VecNumber, VecConstr, VecMath, VecStepper, VecTransfer, VecUpdate
+
+
+class VecWackyEnv:
+    """
+    Steps `n_envs` copies of a :class:`wacky_envs.WackyEnv` at once. The state of each module is held as
+    an array of shape `(n_envs,)` (struct-of-arrays), so one call of :func:`VecWackyEnv.step` advances
+    every copy with vectorized numpy operations.
+
+    The vectorized environment is built from the module graph of `env`, which is only read and never changed.
+    Supported modules are:
+
+     - Stepper: :class:`wacky_envs.steppers.FixStepper`
+     - Numbers: :class:`wacky_envs.numbers.WackyFloat`, :class:`wacky_envs.numbers.WackyInt`,
+       :class:`wacky_envs.numbers.FloatConstr`, :class:`wacky_envs.numbers.IntConstr`,
+       :class:`wacky_envs.numbers.WackyMath`
+     - Callables: :class:`wacky_envs.callables.ValueTransfer`, :class:`wacky_envs.callables.ValueUpdate`
+     - Actions: :class:`wacky_envs.actions.DiscreteAction`, :class:`wacky_envs.actions.AtomizedAction`,
+       :class:`wacky_envs.actions.DiscreteSinglesToMulti`, :class:`wacky_envs.actions.BoxAction`
+     - Observations: :class:`wacky_envs.observations.BoxObs` (of modules with scalar values), also wrapped
+       in a :class:`wacky_envs.observations.HistoryObs` (the histories of all copies are held in one
+       batched :class:`wacky_envs.observations.RingHistory`)
+
+    Copies that are done get reset automatically at the end of :func:`VecWackyEnv.step`. Their last
+    observation is returned in `info['terminal_observation']`.
+    """
+
+    def __init__(self, env: WackyEnv, n_envs: int):
+        """
+        Builds the vectorized modules.
+
+        :param env: Environment that is used as the template for all copies.
+        :type env: :class:`wacky_envs.WackyEnv`
+
+        :param n_envs: Number of environment copies.
+        :type n_envs: int
+        """
+        self.env = env
+        self.n_envs = n_envs
+        self._vec_modules = {}
+
+        if not isinstance(env._stepper, FixStepper):
+            raise TypeError(f'Expected type: FixStepper. Got {type(env._stepper)} instead.')
+        self._stepper = VecStepper(env._stepper, n_envs)
+        self._vec_modules[env._stepper.id] = self._stepper
+
+        self._obs = [self.lookup(module) for module in self._init_obs(env._obs)]
+        self._history = None
+        if isinstance(env._obs, HistoryObs):
+            self._history = RingHistory(env._obs.k, (len(self._obs),), batch_size=n_envs)
+        self._action = self._init_action(env._action)
+        self._reward = self.lookup(env._reward)
+        self._terminator = self.lookup(env._terminator)
+        self.reset_modules = [self.lookup(module) for module in (env.reset_modules or [])]
+        self.call_modules = [self.lookup(module) for module in (env.call_modules or [])]
+        self.step_modules = [self.lookup(module) for module in (env.step_modules or [])]
+
+    @staticmethod
+    def _init_obs(obs) -> list:
+        if isinstance(obs, HistoryObs):
+            obs = obs.obs
+        if not isinstance(obs, BoxObs):
+            raise TypeError(f'Expected type: BoxObs. Got {type(obs)} instead.')
+        return obs.value_list
+
+    def lookup(self, module: EnvModule):
+        """
+        Returns the vectorized counterpart of `module`. Builds it first, if it does not exist yet.
+
+        :param module: Module of the template environment (or `None`)
+        :type module: :class:`wacky_envs.EnvModule`
+
+        :return: Vectorized module (or `None`)
+        """
+        if module is None:
+            return None
+        if module.id in self._vec_modules:
+            return self._vec_modules[module.id]
+
+        if isinstance(module, (FloatConstr, IntConstr)):
+            vec_module = VecConstr(module, self.n_envs, self.lookup)
+        elif isinstance(module, (WackyFloat, WackyInt)):
+            vec_module = VecNumber(module, self.n_envs)
+        elif isinstance(module, WackyMath):
+            vec_module = VecMath(module, self.n_envs, self.lookup)
+        elif isinstance(module, ValueTransfer):
+            vec_module = VecTransfer(module, self.n_envs, self.lookup)
+        elif isinstance(module, ValueUpdate):
+            vec_module = VecUpdate(module, self.n_envs, self.lookup)
+        else:
+            raise TypeError(f'{module.__class__.__name__} is not supported by {self.__class__.__name__}.')
+
+        self._vec_modules[module.id] = vec_module
+        return vec_module
+
+    def _init_action(self, action):
+        """Returns a function that assigns a batch of actions of shape `(n_envs,)` or `(n_envs, n)`."""
+        if isinstance(action, (DiscreteAction, BoxAction)):
+            target = self.lookup(action.changeable_decision if isinstance(action, DiscreteAction)
+                                 else action.set_value_at)
+            return lambda actions: target.set(np.reshape(actions, -1))
+        elif isinstance(action, AtomizedAction):
+            target = self.lookup(action.changeable_value)
+            return lambda actions: target.set(action.decode(np.reshape(actions, -1)))
+        elif isinstance(action, DiscreteSinglesToMulti) and all(
+                isinstance(single, AtomizedAction) for single in action.single_discretes):
+            # All values are decoded in one call:
+            targets = [self.lookup(single.changeable_value) for single in action.single_discretes]
+
+            def assign(actions):
+                values = action.decode(actions)
+                for i, target in enumerate(targets):
+                    target.set(values[:, i])
+            return assign
+        elif isinstance(action, DiscreteSinglesToMulti):
+            singles = [self._init_action(single) for single in action.single_discretes]
+
+            def assign(actions):
+                actions = np.asarray(actions)
+                for i, single in enumerate(singles):
+                    single(actions[:, i])
+            return assign
+        else:
+            raise TypeError(f'{action.__class__.__name__} is not supported by {self.__class__.__name__}.')
+
+    @property
+    def num_envs(self) -> int:
+        """Number of environment copies."""
+        return self.n_envs
+
+    @property
+    def observation_space(self) -> spaces.Space:
+        """Gym space for the observation of a single copy."""
+        return self.env.observation_space
+
+    @property
+    def action_space(self) -> spaces.Space:
+        """Gym space for the action of a single copy."""
+        return self.env.action_space
+
+    @property
+    def observation(self) -> np.ndarray:
+        """Current observations of all copies, shape `(n_envs, n_values)`."""
+        return np.stack([module.value for module in self._obs], axis=1).astype(np.float64)
+
+    @property
+    def reward(self) -> np.ndarray:
+        """Current step rewards, shape `(n_envs,)`."""
+        return np.asarray(self._reward.value, dtype=np.float64)
+
+    @property
+    def done(self) -> np.ndarray:
+        """True for each copy that terminates, shape `(n_envs,)`."""
+        return np.asarray(self._terminator.value, dtype=bool) | self._stepper.done
+
+    @property
+    def t(self) -> np.ndarray:
+        """Current episode step count of each copy."""
+        return self._stepper.t
+
+    @property
+    def delta_t(self) -> float:
+        """Step timeframe (the same for all copies)."""
+        return self._stepper.delta_t
+
+    @property
+    def episode_delta_t(self) -> np.ndarray:
+        """Current episode timeframe of each copy."""
+        return self._stepper.episode_delta_t
+
+    def step(self, actions) -> tuple:
+        """
+        Same call order as :func:`wacky_envs.WackyEnv.step`, applied to all copies at once.
+
+        :param actions: Actions for all copies, shape `(n_envs,)` or `(n_envs, n)`
+
+        :return: Tuple of observations, rewards, dones and info
+        :rtype: tuple
+        """
+        self._action(actions)
+
+        for module in self.call_modules:
+            module()
+
+        for module in self.step_modules:
+            module.step(self.t, self.delta_t, self.episode_delta_t)
+
+        self._stepper.next()
+        self._terminator.step(self.t, self.delta_t, self.episode_delta_t)
+        obs, reward, done = self.observation, self.reward, self.done
+        if self._history is not None:
+            self._history.push(obs)
+            obs = self._history_obs()
+
+        info = {}
+        if np.any(done):
+            info['terminal_observation'] = obs.copy()
+            self._reset(done)
+            if self._history is not None:
+                self._history.fill(self.observation, done)
+                obs = self._history_obs()
+            else:
+                obs[done] = self.observation[done]
+        return obs, reward, done, info
+
+    def _history_obs(self) -> np.ndarray:
+        """Copy of the histories of all copies, shape `(n_envs,) + observation_space.shape`."""
+        return self._history.history.copy().reshape((self.n_envs,) + self.observation_space.shape)
+
+    def _reset(self, mask: np.ndarray) -> None:
+        self._stepper.reset(mask)
+        for module in self.reset_modules:
+            module.reset(mask)
+
+    def reset(self) -> np.ndarray:
+        """
+        Resets all copies.
+
+        :return: Current observations, shape `(n_envs, n_values)`
+        :rtype: np.ndarray
+        """
+        self._reset(np.ones(self.n_envs, dtype=bool))
+        if self._history is not None:
+            self._history.fill(self.observation)
+            return self._history_obs()
+        return self.observation